@@ -1,13 +1,43 @@
 
+import argparse
+import concurrent.futures
+import hashlib
 import itertools
-from collections import deque
+import json
+import logging
+import math
+import mmap
+import os
+import pickle
+import sqlite3
+import statistics
+import struct
+import sys
+import tracemalloc
+from array import array
+from collections import deque, OrderedDict
 import time
+try:
+    import numpy
+except ImportError:
+    # only needed for the optional NumpyGrid engine
+    numpy = None
+
+logger = logging.getLogger(__name__)
+logger.addHandler(logging.NullHandler())
+# finer than DEBUG: every queued cell and a full board dump after every cell change
+TRACE = 5
+logging.addLevelName(TRACE,"TRACE")
 
 
 class Cell():
-    def __init__(self,group,x,y):
+    def __init__(self,group,x,y,index=0):
         self._x = x
         self._y = y
+        self._index = index
+        self._bit = 1 << index
+        self._neighbour_mask = 0
+        self._neighbours = []
         self._liberties = set([])
         self._connections = set([])
         self._possible_pools = set([])
@@ -15,7 +45,7 @@ class Cell():
         group.add_member(self)
     
     def __str__(self):
-        return self._group.get_display_char(self)
+        return self.group.get_display_char(self)
     
     @property
     def x(self):
@@ -27,6 +57,19 @@ class Cell():
     def coords(self):
         return [self._x,self._y]
     @property
+    def index(self):
+        return self._index
+    @property
+    def bit(self):
+        return self._bit
+    @property
+    def neighbour_mask(self):
+        # static: the liberties this cell started with, one bit per cell index
+        return self._neighbour_mask
+    @property
+    def neighbours(self):
+        return self._neighbours
+    @property
     def liberties(self):
         return self._liberties
     @property
@@ -34,12 +77,18 @@ class Cell():
         return [each_cell.coords for each_cell in self._liberties]
     @property
     def group(self):
-        return self._group
+        # groups merge union-find style, so the group this cell was put in may since have been absorbed into another
+        group = self._group
+        if group.absorbed_by is not None:
+            group = group.find()
+            self._group = group
+        return group
     @group.setter
     def group(self,new_group):
-        if self._group is new_group: return
-        if self._group is not None:
-            self._group.del_member(self)
+        old_group = self.group
+        if old_group is new_group: return
+        if old_group is not None:
+            old_group.del_member(self)
         self._group = new_group
         new_group.add_member(self)
     @property
@@ -59,20 +108,36 @@ class Cell():
     def check_possible_pools(self):
         for each_pool in self._possible_pools:
             each_pool.check_for_forced_island()
-    @staticmethod
-    def get_all_possible_pools_from_cells(cells):
-        all_possible_pools = set([])
-        for each_cell in cells:
-            all_possible_pools.update(each_cell.possible_pools)
-        return all_possible_pools
     
     def has_liberty(self,liberty):
         if liberty in self._liberties: return True
     def add_liberty(self,new_liberty):
-        if new_liberty not in self._liberties: self._liberties.add(new_liberty)
+        if new_liberty not in self._liberties:
+            self._liberties.add(new_liberty)
+            self.group.add_member_liberty(new_liberty)
+    def add_neighbour(self,new_neighbour):
+        self.add_liberty(new_neighbour)
+        self._neighbours.append(new_neighbour)
+        self._neighbour_mask |= new_neighbour.bit
+    def reset(self,group):
+        # forget all liberties, connections and pools - used when restoring a board from a BoardState
+        self._liberties = set([])
+        self._connections = set([])
+        self._possible_pools = set([])
+        self._group = group
+        group.add_member(self)
+    def restore_links(self,kinds):
+        # rebuild liberties and connections from the kind of group each cell is in
+        my_kind = kinds[self._index]
+        for each_neighbour in self._neighbours:
+            neighbour_kind = kinds[each_neighbour.index]
+            if my_kind == BoardState.UNASSIGNED or neighbour_kind == BoardState.UNASSIGNED:
+                self.add_liberty(each_neighbour)
+            elif (my_kind == BoardState.NURIKABE) == (neighbour_kind == BoardState.NURIKABE):
+                self._connections.add(each_neighbour)
     def del_liberty(self,lost_liberty):
         self._liberties.remove(lost_liberty)
-        self._group.set_changed()
+        self.group.del_member_liberty(lost_liberty)
     def add_connection(self,new_connection):
         self.del_liberty(new_connection)
         if new_connection not in self._connections: self._connections.add(new_connection)
@@ -125,7 +190,8 @@ class Cell():
 #             print("  cell at",self.coords,"has a liberty of type",type(each_liberty.group),"at",each_liberty.coords)
             if type(each_liberty.group) is Nurikabe:
                 self.mutually_disconnect_from(each_liberty)
-            if type(each_liberty.group) is OrphanIsland:
+            # an orphan absorbed by an earlier liberty in this loop is already part of this island
+            if type(each_liberty.group) is OrphanIsland or type(each_liberty.group) is Island:
                 self.mutually_connect_to(each_liberty)
                 if self.group == each_liberty.group: continue
                 if type(self.group) is Unassigned:
@@ -136,13 +202,17 @@ class Cell():
             self.group.board.create_new_orphan_island(self)
         
 class CellGroup():
+    # no slots of its own, so the groups keep their __dict__ but Path can do without one
+    __slots__ = ()
     def __init__(self,board):
         self._board = board
         self._members = set([])
         self._liberties = set([])
+        self._member_mask = 0
+        self._liberty_mask = 0
 
     def __str__(self):
-        return str(type(self)) + str([each_cell.coords for each_cell in self._members])
+        return str(type(self)) + str([each_cell.coords for each_cell in self.members])
     @staticmethod
     def count_to_character(count):
         if count<10:
@@ -155,6 +225,9 @@ class CellGroup():
     def members(self):
         return self._members
     @property
+    def member_mask(self):
+        return self._member_mask
+    @property
     def changed(self):
         return self._changed
     def set_changed(self):
@@ -163,67 +236,278 @@ class CellGroup():
         
     def add_member(self,new_cell):
         self._members.add(new_cell)
+        self._member_mask |= new_cell.bit
         self.set_changed()
     
     @property
     def liberties(self):
         return self._liberties
     @property
+    def liberty_mask(self):
+        return self._liberty_mask
+    @property
     def liberty_coords(self):
-        return [each_cell.coords for each_cell in self._liberties]
-    
-    def update_liberties(self):
-#         print("  updating liberties for group",str(self))
-        self._liberties.clear()
-        for cell in self._members:
-            self._liberties.update(cell.liberties)
-    
+        return [each_cell.coords for each_cell in self.liberties]
+
+
+class PathStore():
+    # deque-like container of paths, keyed by the bitmask of path members so that
+    # duplicate checks and removals don't have to scan every path.  also indexes the keys by member
+    # cell bit, so the paths through a cell can be found without looking at the rest
+    def __init__(self):
+        self._paths = OrderedDict()
+        self._keys_by_bit = {}
+
+    def __len__(self):
+        return len(self._paths)
+    def __iter__(self):
+        return iter(self._paths.values())
+    def __contains__(self,path):
+        return self._paths.get(path.member_mask) is path
+
+    @property
+    def first(self):
+        return next(iter(self._paths.values()))
+
+    def contains_mask(self,member_mask):
+        return member_mask in self._paths
+    def containing(self,cell):
+        return [self._paths[each_key] for each_key in self._keys_by_bit.get(cell.bit,())]
+
+    def index_key(self,key):
+        bits = key
+        while bits:
+            low_bit = bits & -bits
+            keys = self._keys_by_bit.get(low_bit)
+            if keys is None:
+                self._keys_by_bit[low_bit] = set([key])
+            else:
+                keys.add(key)
+            bits ^= low_bit
+    def unindex_key(self,key):
+        bits = key
+        while bits:
+            low_bit = bits & -bits
+            self._keys_by_bit[low_bit].discard(key)
+            bits ^= low_bit
+
+    def append(self,path):
+        key = path.member_mask
+        self._paths[key] = path
+        self.index_key(key)
+    def appendleft(self,path):
+        key = path.member_mask
+        self._paths[key] = path
+        self._paths.move_to_end(key,last=False)
+        self.index_key(key)
+    def popleft(self):
+        key,path = self._paths.popitem(last=False)
+        self.unindex_key(key)
+        return path
+    def remove(self,path):
+        key = path.member_mask
+        del self._paths[key]
+        self.unindex_key(key)
+
+
+class CellQueue():
+    # cells waiting to be assigned, one deque per priority plus a set so membership checks are O(1).
+    #   lower priorities pop first, so cheap forced deductions (a group down to one liberty) run before
+    #   the ones found by path analysis.  the board pops from whichever of its two queues has the lower
+    #   next_priority, so that holds across island and nurikabe cells too.  the depth across both is in SolveStats
+    FORCED = 0
+    LOCAL = 1
+    PATH = 2
+    def __init__(self):
+        self._queues = (deque(),deque(),deque())
+        self._cells = set([])
+
+    def __len__(self):
+        return len(self._cells)
+    def __iter__(self):
+        return itertools.chain(*self._queues)
+    def __contains__(self,cell):
+        return cell in self._cells
+
+    @property
+    def next_priority(self):
+        # the priority of the cell popleft would give, or one past the lowest if there isn't one
+        for each_priority,each_queue in enumerate(self._queues):
+            if each_queue: return each_priority
+        return len(self._queues)
+    @property
+    def first(self):
+        for each_queue in self._queues:
+            if each_queue: return each_queue[0]
+        raise IndexError("pop from an empty cell queue")
+    def items(self):
+        # (cell, priority) in the order they would be popped
+        for each_priority,each_queue in enumerate(self._queues):
+            for each_cell in each_queue:
+                yield each_cell,each_priority
+
+    def append(self,cell,priority=LOCAL):
+        if cell in self._cells: return False
+        self._cells.add(cell)
+        self._queues[priority].append(cell)
+        return True
+    def popleft(self):
+        for each_queue in self._queues:
+            if each_queue:
+                cell = each_queue.popleft()
+                self._cells.remove(cell)
+                return cell
+        raise IndexError("pop from an empty cell queue")
+    def clear(self):
+        for each_queue in self._queues:
+            each_queue.clear()
+        self._cells.clear()
+
+
 class ExclusiveGroup(CellGroup):
+    # the groups a cell actually belongs to.  liberties are kept current as cells join and leave and as
+    #   member cells gain or lose liberties, by counting how many members border each liberty
     def __init__(self,board):
+        self._version = 0
         super().__init__(board)
         self._paths = None
+        self._path_length = 0
+        self._liberty_counts = {}
+        self._absorbed_by = None
     @property
     def paths(self):
         return self._paths
+    def reset_paths(self):
+        if self._paths is None: return
+        self._paths = None
+        self._path_length = 0
+        self.touch()
+    @property
+    def version(self):
+        # bumped whenever the members, liberties or paths change - the board uses it to skip solution steps
+        #   on groups that haven't changed since the step last looked at them
+        return self._version
+    def touch(self):
+        self._version += 1
+    def set_changed(self):
+        super().set_changed()
+        self._version += 1
+    @property
+    def absorbed_by(self):
+        return self._absorbed_by
+    def find(self):
+        # the group this one has ended up merged into, compressing the chain of absorbed groups on the way
+        root = self
+        while root._absorbed_by is not None:
+            root = root._absorbed_by
+        group = self
+        while group._absorbed_by is not None and group._absorbed_by is not root:
+            next_group = group._absorbed_by
+            group._absorbed_by = root
+            group = next_group
+        return root
     def get_display_char(self,requesting_cell):
         return ' '
     def add_member(self,new_cell):
         super().add_member(new_cell)
-        self._paths=None
+        for each_liberty in new_cell.liberties:
+            self.add_member_liberty(each_liberty)
+        self.reset_paths()
     def del_member(self,lost_member):
         self._members.discard(lost_member)
+        self._member_mask &= ~lost_member.bit
+        for each_liberty in lost_member.liberties:
+            self.del_member_liberty(each_liberty)
         if self._members:
             self.set_changed()
         else:
-            self._paths=None #should only delete members when merging, so no need to remove paths until group is empty
+            self.reset_paths() #should only delete members when merging, so no need to remove paths until group is empty
             self.board.del_group(self)
 
+    def add_member_liberty(self,new_liberty):
+        count = self._liberty_counts.get(new_liberty,0)
+        self._liberty_counts[new_liberty] = count + 1
+        if not count:
+            self._liberties.add(new_liberty)
+            self._liberty_mask |= new_liberty.bit
+        self.set_changed()
+    def del_member_liberty(self,lost_liberty):
+        count = self._liberty_counts.get(lost_liberty)
+        if count is None: return
+        if count == 1:
+            del self._liberty_counts[lost_liberty]
+            self._liberties.discard(lost_liberty)
+            self._liberty_mask &= ~lost_liberty.bit
+        else:
+            self._liberty_counts[lost_liberty] = count - 1
+        self.set_changed()
+    def update_liberties(self):
+        # nothing to do, liberties are kept up to date incrementally
+        pass
+
     def merge_with(self,other_group):
 #         print("      merging",str(self),"with",str(other_group))
-        while self._members:
-            self._members.pop().group = other_group
+        # union by size: the smaller group is absorbed into the larger
+        if len(other_group.members) < len(self._members):
+            self.absorb(other_group)
+        else:
+            other_group.absorb(self)
+    def absorb(self,absorbed_group):
+        # take over the absorbed group's members and liberty counts in bulk.  its cells aren't touched - they
+        #   find this group through absorbed_by the next time they look
+        self._members.update(absorbed_group.members)
+        self._member_mask |= absorbed_group.member_mask
+        for each_liberty,count in absorbed_group._liberty_counts.items():
+            if each_liberty not in self._liberty_counts:
+                self._liberty_counts[each_liberty] = count
+                self._liberties.add(each_liberty)
+                self._liberty_mask |= each_liberty.bit
+            else:
+                self._liberty_counts[each_liberty] += count
+        absorbed_group.become_absorbed_by(self)
+        self.reset_paths()
+        self.set_changed()
+        self.board.del_group(absorbed_group)
+    def become_absorbed_by(self,absorbing_group):
+        self._absorbed_by = absorbing_group
+        self._members = set([])
+        self._member_mask = 0
+        self._liberty_counts = {}
+        self._liberties = set([])
+        self._liberty_mask = 0
+        self.reset_paths()
         
     def update(self):
         pass
     
     def extend_paths_to(self,length):
+        # returns True if this group is still short of length
 #         print()
 #         print("extending/building paths for",self)
         if not self.liberties:
-            self._paths = None
-            return
+            self.reset_paths()
+            return False
         if self._paths is None:
-            self._paths = deque([])
-            self.add_path(set([]))
+            self._paths = PathStore()
+            self._path_length = 0
+            self.touch()
+            self.add_path(0)
         else:
             for each_path in self._paths:
                 each_path.update_liberties()
+        # paths that were thrown away are built back up one length at a time, the same as the board does
+        #   from the start, so the other groups don't have to go back to length 1 with them
+        target_length = length
+        length = min(length,self._path_length+1)
+        self._path_length = length
         first_path = None
-        while first_path is None or self._paths[0] is not first_path:
+        while first_path is None or self._paths.first is not first_path:
             if not self.paths:
-                print("Error! no paths left to extend in",self)
+                logger.debug("Error! no paths left to extend in %s",self)
+                self.board.set_contradiction("no paths left to extend in "+str(self))
+                return False
             if first_path is None:
-                first_path = self._paths[0]
+                first_path = self._paths.first
             next_path = self._paths.popleft()
             if not next_path.terminated and len(next_path.members)<length:
                 next_path.extend()
@@ -231,31 +515,33 @@ class ExclusiveGroup(CellGroup):
                 self._paths.append(next_path)
             if first_path not in self._paths:
                 first_path = None
+        return length < target_length and not self.all_paths_terminated()
                 
-    def path_is_duplicate(self,members):
-        for each_path in self._paths:
-#             print("      checking new path",[each_cell.coords for each_cell in members],"for duplication of existing path",each_path)
-            if each_path.members == members:
-#                 print("duplicate path")
-                return True
-        return False
+    def path_is_duplicate(self,member_mask):
+        return self._paths.contains_mask(member_mask)
 
-    def add_path(self,members):
-        if not self.path_is_duplicate(members):
-            self._paths.append(self.make_new_path(members))
+    def add_path(self,member_mask):
+        if not self.path_is_duplicate(member_mask):
+            self.board.stats.paths_built += 1
+            self._paths.append(self.make_new_path(member_mask))
+            self.touch()
 #             print(self._paths)
-    def add_path_left(self,members,absorbed_orphans=None):
-        if not self.path_is_duplicate(members):
+    def add_path_left(self,member_mask,absorbed_orphans=None):
+        if not self.path_is_duplicate(member_mask):
+            self.board.stats.paths_built += 1
             if absorbed_orphans is None:
-                self._paths.appendleft(self.make_new_path(members))
+                self._paths.appendleft(self.make_new_path(member_mask))
             else:
-                self._paths.appendleft(self.make_new_path(members,absorbed_orphans))
+                self._paths.appendleft(self.make_new_path(member_mask,absorbed_orphans))
+            self.touch()
 #             print(self._paths)
-    def make_new_path(self,members,absorbed_orphans = None):
+    def make_new_path(self,member_mask,absorbed_orphans = None):
         return None
     
     def remove_path(self,path):
+        self.board.stats.paths_pruned += 1
         self._paths.remove(path)
+        self.touch()
         
     def all_paths_terminated(self):
         if self._paths is None: return False
@@ -265,17 +551,26 @@ class ExclusiveGroup(CellGroup):
         return True
     
     def invalidate_paths(self,changing_cell):
+        # throws all the paths away if the changing cell is in or next to any of them - returns True if it did
         if self._paths is None: return False
+        changing_bit = changing_cell.bit
         for each_path in self._paths:
-            if changing_cell in each_path.members.union(each_path.liberties):
-                self._paths = None
+            if (each_path.member_mask | each_path.liberty_mask) & changing_bit:
+                self.reset_paths()
                 return True
         return False
+    def remove_paths_containing(self,changing_cell):
+        # the cell can no longer be part of a path, but paths next to it are still good
+        removed_something = False
+        for each_path in self._paths.containing(changing_cell):
+            self.remove_path(each_path)
+            removed_something = True
+        return removed_something
     def all_paths_are_blocked_by_path(self,other_path):
         if self._paths is None: return False
-        cells_blocked = other_path.members
+        blocked_mask = other_path.member_mask
         for each_path in self._paths:
-            if not each_path.members.intersection(cells_blocked):
+            if not each_path.member_mask & blocked_mask:
                 return False
         return True 
         
@@ -314,22 +609,20 @@ class Island(ExclusiveGroup):
         if new_orphan not in self._required_absorbed_orphans:
 #             print("  adding new required orphan",new_orphan,"to",self)
             self._required_absorbed_orphans.add(new_orphan)
+            self.touch()
             if self._paths is not None:
-                P = len(self._paths)
-                while P:
-                    P-=1
-                    each_path = self._paths[P]
+                for each_path in list(self._paths):
 #                     print("    checking path",each_path)
                     if new_orphan not in each_path.absorbed_orphans:
                         if each_path.terminated or each_path.get_path_length()+len(new_orphan.members)+1>self.missing_cell_count():
 #                             print("      nope, removing it")
-                            self._paths.remove(each_path)
+                            self.remove_path(each_path)
     def replace_required_orphans(self,old_orphan,new_orphan):
         if old_orphan in self.required_absorbed_orphans:
             self._required_absorbed_orphans.remove(old_orphan)
             self._required_absorbed_orphans.add(new_orphan)
             # this occurrence is so rare, just invalidate the paths so they will be recalculated
-            self._paths = None
+            self.reset_paths()
 
     def add_member(self,new_cell):
         if not self._members:
@@ -340,28 +633,34 @@ class Island(ExclusiveGroup):
         if type(other_group) is OrphanIsland:
             if other_group in self._required_absorbed_orphans:
                 self._required_absorbed_orphans.remove(other_group)
-            other_group.merge_with(self)
+            # the island always survives, whatever the sizes
+            self.absorb(other_group)
         else:
-            print("Error! tried to merge island",self,"with non-orphan island",other_group)
+            logger.debug("Error! tried to merge island %s with non-orphan island %s",self,other_group)
+            self.board.set_contradiction("tried to merge island "+str(self)+" with "+str(other_group))
     
     def is_complete(self):
         if len(self._members)==self._count: return True
         return False
     def close_completed(self):
         if self.is_complete():
-            print("  island",str(self),'complete!')
+            logger.debug("  island %s complete!",self)
             for each_liberty in self.liberties:
                 self.board.queue_nurikabe_cell(each_liberty)
             self.board.island_closed(self)
-            self._liberties.clear()
+            self.close_liberties()
             return True
         return False
+    def close_liberties(self):
+        self._liberty_counts.clear()
+        self._liberties.clear()
+        self._liberty_mask = 0
     
     def missing_cell_count(self):
         return self._count - len(self._members)
     
     def update(self):
-        print("updating group",str(self))
+        logger.debug("updating group %s",self)
         self._changed=False
         if self.close_completed(): return
         liberties = self.liberties
@@ -370,97 +669,196 @@ class Island(ExclusiveGroup):
         if len(liberties)==1:
             for each_liberty in liberties:
 #                 print("    island",str(self),"has only one liberty",each_liberty.coords)
-                self.board.queue_island_cell(each_liberty)
+                self.board.queue_island_cell(each_liberty,CellQueue.FORCED)
         # check for a fork with a common neighbor
         if len(liberties)==2:
             if self.missing_cell_count()==1:
+                # liberties are unassigned, and an unassigned cell's liberties are just its neighbours
                 overlap = None
                 for each_liberty in liberties:
                     if overlap is None:
-                        overlap = each_liberty.liberties
+                        overlap = set(each_liberty.neighbours)
                     else:
-                        overlap = overlap & each_liberty.liberties
+                        overlap.intersection_update(each_liberty.neighbours)
                 if overlap:
                     for each_liberty in overlap:
 #                         print("    found fork at",each_liberty.coords,"in",str(self))
                         self.board.queue_nurikabe_cell(each_liberty)
         # check for another island too close
         for each_liberty in liberties:
-            for next_liberty in each_liberty.liberties:
+            for next_liberty in each_liberty.neighbours:
                 if next_liberty.group is not self and type(next_liberty.group) is Island:
 #                     print("    ",str(self),"and",str(next_liberty.group),"share liberty",each_liberty.coords)
                     self.board.queue_nurikabe_cell(each_liberty)
     
-    def make_new_path(self,members,absorbed_orphans=None):
-        return IslandPath(self.board,self,members,absorbed_orphans)
+    def invalidate_paths(self,changing_cell):
+        # a new wall only rules out the paths through it.  a new island or orphan cell changes which
+        #   orphans the paths next to it absorb, so those still need rebuilding
+        if self._paths is None: return False
+        if type(changing_cell.group) is Nurikabe:
+            self.remove_paths_containing(changing_cell)
+            return False
+        return super().invalidate_paths(changing_cell)
+    def make_new_path(self,member_mask,absorbed_orphans=None):
+        return IslandPath(self,member_mask,absorbed_orphans)
+    def export_paths(self):
+        # the path length and paths as plain data for another process: each path is its member mask and a cell
+        #   index from each orphan it absorbs.  orphans since merged away have no cells left and add nothing
+        if self._paths is None: return self._path_length,None
+        paths = []
+        for each_path in self._paths:
+            orphan_indexes = tuple(next(iter(each_orphan.members)).index for each_orphan in each_path.absorbed_orphans if each_orphan.members)
+            paths.append((each_path.member_mask,orphan_indexes))
+        return self._path_length,paths
+    def load_paths(self,exported_paths):
+        # replace the paths with ones from export_paths, run on a board in the same state
+        path_length,paths = exported_paths
+        if paths is None:
+            self.reset_paths()
+            return
+        cells = self.board.cells
+        self._paths = PathStore()
+        self._path_length = path_length
+        for member_mask,orphan_indexes in paths:
+            absorbed_orphans = frozenset(cells[each_index].group for each_index in orphan_indexes) if orphan_indexes else None
+            self._paths.append(self.make_new_path(member_mask,absorbed_orphans))
+        self.touch()
+    def iterate_shapes(self,usable_mask,usable_orphans,wall_mask):
+        # streams the final shapes this island could take, as (member mask, liberty mask) pairs, without storing them.
+        #   orphans are taken whole, and a shape next to an orphan it doesn't take, missing a required orphan, or
+        #   whose liberties would finish a pool is never yielded.  islands small enough for the polyomino library
+        #   just filter its placements; bigger ones are grown
+        if self._count <= self.board.polyominoes.max_size:
+            return self.iterate_placed_shapes(usable_mask,usable_orphans,wall_mask)
+        return self.iterate_grown_shapes(usable_mask,usable_orphans,wall_mask)
+    def iterate_placed_shapes(self,usable_mask,usable_orphans,wall_mask):
+        board = self.board
+        member_mask = self._member_mask
+        orphan_mask = 0
+        for each_orphan in usable_orphans:
+            orphan_mask |= each_orphan.member_mask
+        blocked_mask = ~(member_mask | usable_mask | orphan_mask)
+        required_masks = [each_orphan.member_mask for each_orphan in self.required_absorbed_orphans]
+        for shape_mask,liberty_mask in board.island_placements(self._starting_cell,self._count):
+            if shape_mask & blocked_mask or member_mask & ~shape_mask: continue
+            # covers both a half-taken orphan and one the shape would touch without taking
+            if liberty_mask & orphan_mask: continue
+            if any(not shape_mask & each_mask for each_mask in required_masks): continue
+            if board.liberties_finish_pool(liberty_mask,wall_mask): continue
+            yield shape_mask,liberty_mask
+    def iterate_grown_shapes(self,usable_mask,usable_orphans,wall_mask):
+        # Redelmeier's method keeps every shape unique: a cell or orphan skipped at one level stays skipped below it
+        board = self.board
+        missing = self.missing_cell_count()
+        orphan_by_bit = {}
+        for each_orphan in usable_orphans:
+            for each_cell in each_orphan.members:
+                orphan_by_bit[each_cell.bit] = each_orphan
+        required_orphans = self.required_absorbed_orphans
+        def frontier_of(node_mask,seen_mask):
+            nodes = []
+            neighbour_mask = 0
+            for each_cell in board.cells_from_mask(node_mask):
+                neighbour_mask |= each_cell.neighbour_mask
+            neighbour_mask &= ~seen_mask
+            while neighbour_mask:
+                low_bit = neighbour_mask & -neighbour_mask
+                if low_bit & usable_mask:
+                    nodes.append((low_bit,1,None))
+                    seen_mask |= low_bit
+                    neighbour_mask ^= low_bit
+                elif low_bit in orphan_by_bit:
+                    orphan = orphan_by_bit[low_bit]
+                    nodes.append((orphan.member_mask,len(orphan.members),orphan))
+                    seen_mask |= orphan.member_mask
+                    neighbour_mask &= ~orphan.member_mask
+                else:
+                    neighbour_mask ^= low_bit
+            return nodes,seen_mask
+        def finished_shape(shape_mask,untried):
+            for each_node in untried:
+                if each_node[2] is not None: return None
+            for each_orphan in required_orphans:
+                if not shape_mask & each_orphan.member_mask: return None
+            liberty_mask = 0
+            for each_cell in board.cells_from_mask(shape_mask):
+                liberty_mask |= each_cell.neighbour_mask
+            liberty_mask &= ~shape_mask
+            if board.liberties_finish_pool(liberty_mask,wall_mask): return None
+            return liberty_mask
+        def grow(shape_mask,size,untried,seen_mask):
+            if size == missing:
+                liberty_mask = finished_shape(shape_mask,untried)
+                if liberty_mask is not None:
+                    yield shape_mask,liberty_mask
+                return
+            untried = list(untried)
+            while untried:
+                node_mask,node_size,orphan = untried.pop()
+                if size + node_size <= missing:
+                    new_nodes,new_seen_mask = frontier_of(node_mask,seen_mask)
+                    yield from grow(shape_mask | node_mask,size + node_size,untried + new_nodes,new_seen_mask)
+                # every shape without this orphan would be next to it
+                if orphan is not None: return
+        untried,seen_mask = frontier_of(self._member_mask,self._member_mask)
+        yield from grow(self._member_mask,0,untried,seen_mask)
     def path_overlaps(self):
         common = Path.common_to_all_paths(self.paths)
         for each_cell in common:
             # problem: this forgets that the new island cell must connect to this island - need to remember that and tell the new orphan island (if any)
-            self.board.queue_island_cell(each_cell)
+            self.board.queue_island_cell(each_cell,CellQueue.PATH)
         common = Path.common_neighbor_to_all_paths(self.paths)
         for each_cell in common:
-            self.board.queue_nurikabe_cell(each_cell)
+            self.board.queue_nurikabe_cell(each_cell,CellQueue.PATH)
     def remove_paths_blocking_nurikabe_liberties(self,each_nurikabe):
         if self._paths is None: return False
         removed_something = False
-        P = len(self._paths)
-        while P:
-            P-=1
-            each_path = self._paths[P]
-            if not each_nurikabe.liberties - each_path.members:
+        for each_path in list(self._paths):
+            if not each_nurikabe.liberty_mask & ~each_path.member_mask:
 #                 print("  removing",each_path,"from",self)
                 removed_something = True
-                self._paths.remove(each_path)
+                self.remove_path(each_path)
 #         if removed_something:
 #             self.path_overlaps()
         return removed_something
     def remove_paths_excluding_other_island_paths(self,other_island):
         if self._paths is None: return False
         removed_something = False
-        P = len(self._paths)
-        while P:
-            P-=1
-            each_path = self._paths[P]
+        for each_path in list(self._paths):
             if other_island.all_paths_are_blocked_by_other_island_path(each_path):
 #                 print("  removing",each_path,"from",self)
                 removed_something = True
-                self._paths.remove(each_path)
+                self.remove_path(each_path)
         return removed_something
     def remove_paths_excluding_nurikabe_paths(self,other_nurikabe):
         if self._paths is None: return False
         removed_something = False
-        P = len(self._paths)
-        while P:
-            P-=1
-            each_path = self._paths[P]
+        for each_path in list(self._paths):
             if other_nurikabe.all_paths_are_blocked_by_path(each_path):
 #                 print("  removing",each_path,"from",self)
                 removed_something = True
-                self._paths.remove(each_path)
+                self.remove_path(each_path)
         return removed_something
     def all_paths_are_blocked_by_other_island_path(self,other_path):
         if self._paths is None: return False
-        cells_blocked = other_path.cells_blocked
+        blocked_mask = other_path.cells_blocked_mask
         for each_path in self._paths:
-            if not each_path.members.intersection(cells_blocked):
+            if not each_path.member_mask & blocked_mask:
                 return False
         return True 
     def remove_paths_containing_blocked_cells(self,blocked_cells):
+        # blocked_cells is a mask, as returned by cells_blocked
         if self._paths is None: return False
         removed_something = False
-        P = len(self._paths)
-        while P:
-            P-=1
-            each_path = self._paths[P]
-            if each_path.members.intersection(blocked_cells):
+        for each_path in list(self._paths):
+            if each_path.member_mask & blocked_cells:
 #                 print("  removing",each_path,"from",self)
                 removed_something = True
-                self._paths.remove(each_path)
+                self.remove_path(each_path)
         return removed_something
     @property
     def cells_blocked(self):
-        return Path.common_cells_blocked_by_all_paths(self.paths)
+        return Path.common_cells_blocked_mask_by_all_paths(self.paths)
     
 class Nurikabe(ExclusiveGroup):        
     def get_display_char(self, requesting_cell):
@@ -475,7 +873,7 @@ class Nurikabe(ExclusiveGroup):
 #                     self.board.queue_island_cell(overlapping_liberty)
 
     def update(self):
-        print("updating group",str(self))
+        logger.debug("updating group %s",self)
         self._changed=False
         liberties = self.liberties
 #         print("  nurikabe",str(self),"has",len(liberties),"liberties",self.liberty_coords)
@@ -483,24 +881,29 @@ class Nurikabe(ExclusiveGroup):
             if len(liberties)==1:
                 for each_liberty in liberties:
 #                     print("  nurikabe has only one liberty",each_liberty.coords)
-                    self.board.queue_nurikabe_cell(each_liberty)
-    def make_new_path(self,members):
-        return NurikabePath(self.board,self,members)
+                    self.board.queue_nurikabe_cell(each_liberty,CellQueue.FORCED)
+    def invalidate_paths(self,changing_cell):
+        # a new island cell only rules out the paths through it.  a new wall next to a path means a shorter
+        #   path may now end there, so those still need rebuilding
+        if self._paths is None: return False
+        if type(changing_cell.group) is not Nurikabe:
+            self.remove_paths_containing(changing_cell)
+            return False
+        return super().invalidate_paths(changing_cell)
+    def make_new_path(self,member_mask):
+        return NurikabePath(self,member_mask)
     def path_overlaps(self):
         common = Path.common_to_all_paths(self.paths)
         for each_cell in common:
-            self.board.queue_nurikabe_cell(each_cell)
+            self.board.queue_nurikabe_cell(each_cell,CellQueue.PATH)
     def remove_paths_excluding_island_paths(self,other_island):
         if self._paths is None: return False
         removed_something = False
-        P = len(self._paths)
-        while P:
-            P-=1
-            each_path = self._paths[P]
+        for each_path in list(self._paths):
             if other_island.all_paths_are_blocked_by_path(each_path):
 #                 print("  removing",each_path,"from",self)
                 removed_something = True
-                self._paths.remove(each_path)
+                self.remove_path(each_path)
         return removed_something
 
 
@@ -513,18 +916,16 @@ class TemporaryExclusiveGroup(ExclusiveGroup):
         super().add_member(new_cell)
         self._quick_can_reach_islands = None
         self._can_reach_islands = None
+    def absorb(self,absorbed_group):
+        super().absorb(absorbed_group)
+        self._quick_can_reach_islands = None
+        self._can_reach_islands = None
     def calculate_quick_can_reach(self):
-        self._quick_can_reach_islands = []
-        for each_island in self.board.islands:
-            can_reach = False
-            M = len(self._members)
-            for each_member in self._members:
-                delta_x = each_island.starting_cell.x - each_member.x
-                delta_y = each_island.starting_cell.y - each_member.y
-                steps_to_reach = abs(delta_x) + abs(delta_y)
-                if steps_to_reach + M <= each_island.count: can_reach= True
-            if can_reach:
-                self._quick_can_reach_islands.append(each_island)
+        # the islands whose bounded search (see Board.island_reach_masks) gets to any of these cells
+        reach_masks = self.board.island_reach_masks()
+        self._quick_can_reach_islands = [each_island for each_island in self.board.islands if reach_masks[each_island] & self._member_mask]
+    def reset_quick_can_reach(self):
+        self._quick_can_reach_islands = None
         
     def calculate_can_reach(self):
 #         print("  calculating slow can reach for",self)
@@ -546,14 +947,14 @@ class TemporaryExclusiveGroup(ExclusiveGroup):
                     return
 #                 print("      checking",each_path)
                 if can_reach: continue
-                if self.members.intersection(self.get_relevant_members_from_path(each_path)) == self.members:
+                if not self.member_mask & ~self.get_relevant_member_mask_from_path(each_path):
                     can_reach=True
             if can_reach:
                 self._can_reach_islands.append(each_island)
 
-    def get_relevant_members_from_path(self,possible_path):
+    def get_relevant_member_mask_from_path(self,possible_path):
         # to be safe, get absorbed orphans too
-        return possible_path.all_members
+        return possible_path.all_member_mask
                     
     def can_reach_island(self,possible_island):
         # will return a quick answer if full answer is not available yet, so it errs on the side of True
@@ -566,16 +967,6 @@ class TemporaryExclusiveGroup(ExclusiveGroup):
             if possible_island in self._can_reach_islands:
                 return True
         return False
-        
-        
-class Unassigned(TemporaryExclusiveGroup):
-    def get_display_char(self, requesting_cell):
-        return '-'
-    def get_can_reach_islands(self):
-        return self._can_reach_islands
-    def get_relevant_members_from_path(self,possible_path):
-        # for Unassigned, save time by not bothering with absorbed orphans
-        return possible_path.members
     def can_reach_any_island(self):
         # will return a quick answer if full answer is not available yet, so it errs on the side of True
         if self._can_reach_islands is None:
@@ -587,6 +978,16 @@ class Unassigned(TemporaryExclusiveGroup):
             if self._can_reach_islands:
                 return True
         return False
+        
+        
+class Unassigned(TemporaryExclusiveGroup):
+    def get_display_char(self, requesting_cell):
+        return '-'
+    def get_can_reach_islands(self):
+        return self._can_reach_islands
+    def get_relevant_member_mask_from_path(self,possible_path):
+        # for Unassigned, save time by not bothering with absorbed orphans
+        return possible_path.member_mask
 
 
 class OrphanIsland(TemporaryExclusiveGroup):
@@ -608,28 +1009,33 @@ class OrphanIsland(TemporaryExclusiveGroup):
         return None
             
     def update(self):
-        print("updating group",str(self))
+        logger.debug("updating group %s",self)
         self._changed=False
         liberties = self.liberties
 #         print("  orphan island",str(self),"has",len(liberties),"liberties",self.liberty_coords)
         if len(liberties)==1:
             for each_liberty in liberties:
 #                 print("    orphan island",str(self),"has only one liberty",each_liberty.coords)
-                self.board.queue_island_cell(each_liberty)
+                self.board.queue_island_cell(each_liberty,CellQueue.FORCED)
     def merge_with(self,other_group):
         # rare possibility, but it could happen
         if type(other_group) is OrphanIsland:
-            self.board.replace_required_orphans(self,other_group)
+            if len(other_group.members) < len(self._members):
+                self.board.replace_required_orphans(other_group,self)
+            else:
+                self.board.replace_required_orphans(self,other_group)
         super().merge_with(other_group)
 
 
 class Path(CellGroup):
-    def __init__(self,board,group,starting_cells):
-        super().__init__(board)
+    # there can be tens of thousands of these, so a path only keeps bitmasks of its members and liberties
+    #   and builds the cell sets when asked.  the member mask is also the path's key in its group's PathStore
+    __slots__ = ('_group','_member_mask','_liberty_mask','_length','_terminated')
+    def __init__(self,group,member_mask):
         self._group = group
+        self._member_mask = member_mask
+        self._length = bin(member_mask).count("1")
         self._terminated = False
-        while starting_cells:
-            self.add_member(starting_cells.pop())
         self.update_liberties()
         self.check_terminated()
     def __str__(self):
@@ -637,13 +1043,22 @@ class Path(CellGroup):
             return super().__str__() + " terminated"
         return super().__str__()
     @property
-    def all_members(self):
-        return self.members
+    def board(self):
+        return self._group.board
     @property
-    def cells_blocked(self):
-        return self.members
+    def members(self):
+        return self._group.board.cells_from_mask(self._member_mask)
+    @property
+    def liberties(self):
+        return self._group.board.cells_from_mask(self._liberty_mask)
+    @property
+    def all_member_mask(self):
+        return self._member_mask
+    @property
+    def cells_blocked_mask(self):
+        return self._member_mask
     def get_path_length(self):
-        return len(self.members)
+        return self._length
     @property
     def group(self):
         return self._group
@@ -652,67 +1067,68 @@ class Path(CellGroup):
         return self._terminated
     def check_terminated(self):
         pass
+    def update_liberties(self):
+        pass
             
     def extend(self):
         pass
     
     @classmethod
     def common_to_all_paths(cls,paths):
-        common = set([])
-        if paths:
-            common.update(paths[0].members)
-            P = len(paths)
-            while P>1:
-                P-=1
-                common.intersection_update(paths[P].members)
-        return common
+        if not paths: return set([])
+        all_paths = iter(paths)
+        first_path = next(all_paths)
+        common_mask = first_path.member_mask
+        for each_path in all_paths:
+            common_mask &= each_path.member_mask
+        return first_path.board.cells_from_mask(common_mask)
     @classmethod
     def common_neighbor_to_all_paths(cls,paths):
-        common = set([])
-        if paths:
-            for each_path in paths:
-                if not each_path.terminated:
-                    return common
-            common.update(paths[0].liberties)
-            P = len(paths)
-            while P>1:
-                P-=1
-                common.intersection_update(paths[P].liberties)
-        return common
+        if not paths: return set([])
+        for each_path in paths:
+            if not each_path.terminated:
+                return set([])
+        all_paths = iter(paths)
+        first_path = next(all_paths)
+        common_mask = first_path.liberty_mask
+        for each_path in all_paths:
+            common_mask &= each_path.liberty_mask
+        return first_path.board.cells_from_mask(common_mask)
     @classmethod
-    def common_cells_blocked_by_all_paths(cls,paths):
-        common = set([])
+    def common_cells_blocked_mask_by_all_paths(cls,paths):
+        common_mask = 0
         if paths:
-            common.update(paths[0].cells_blocked)
-            P = len(paths)
-            while P>1:
-                P-=1
-                common.intersection_update(paths[P].cells_blocked)
-        return common
-        
+            all_paths = iter(paths)
+            common_mask = next(all_paths).cells_blocked_mask
+            for each_path in all_paths:
+                common_mask &= each_path.cells_blocked_mask
+        return common_mask
 
 
 class IslandPath(Path):
-    def __init__(self,board,group,starting_cells,absorbed_orphans=None):
+    # most paths absorb no orphans, or the same ones as the path they were extended from, so orphan sets are
+    #   frozen and shared rather than copied
+    __slots__ = ('_absorbed_orphans',)
+    NO_ORPHANS = frozenset()
+    def __init__(self,group,member_mask,absorbed_orphans=None):
         if absorbed_orphans is None:
-            self._absorbed_orphans = set([])
+            self._absorbed_orphans = IslandPath.NO_ORPHANS
         else:
             self._absorbed_orphans = absorbed_orphans
-        super().__init__(board,group,starting_cells)
+        super().__init__(group,member_mask)
     def __str__(self):
         return super().__str__() + " with orphans "+str([str(each_orphan) for each_orphan in self.absorbed_orphans])
     @property
-    def all_members(self):
-        all_members = self.members.copy()
+    def all_member_mask(self):
+        all_member_mask = self._member_mask
         for each_orphan in self._absorbed_orphans:
-            all_members.update(each_orphan.members)
-        return all_members
+            all_member_mask |= each_orphan.member_mask
+        return all_member_mask
     @property
-    def cells_blocked(self):
-        cells_blocked = self.all_members
+    def cells_blocked_mask(self):
         if self.terminated:
-            cells_blocked.update(self.liberties)
-        return cells_blocked
+            return self.all_member_mask | self._liberty_mask
+        return self.all_member_mask
     @property
     def absorbed_orphans(self):
         return self._absorbed_orphans
@@ -724,29 +1140,31 @@ class IslandPath(Path):
             count += len(each_orphan.members)
         return count
     def get_path_length(self):
-        return len(self.members)+self.get_absorbed_orphan_count()
+        return self._length+self.get_absorbed_orphan_count()
     def check_terminated(self):
         if self.group.missing_cell_count() == self.get_path_length():
             self._terminated = True
     def update_liberties(self):
-        super().update_liberties()
-        self._liberties.update(self.group.liberties)
-        for each_orphan in self._absorbed_orphans:
-            self._liberties.update(each_orphan.liberties)
-        self._liberties.difference_update(self.members)
-        self._liberties.difference_update(self.group.members)
+        group = self._group
+        liberty_mask = group.liberty_mask
+        excluded_mask = self._member_mask | group.member_mask
+        for each_cell in self.members:
+            liberty_mask |= each_cell.neighbour_mask
         for each_orphan in self._absorbed_orphans:
-            self._liberties.difference_update(each_orphan.members)
+            liberty_mask |= each_orphan.liberty_mask
+            excluded_mask |= each_orphan.member_mask
+        self._liberty_mask = liberty_mask & ~excluded_mask
         
     def extend(self):
 #         print("  extending path",self)
+        member_mask = self._member_mask
         for each_liberty in self.liberties:
             if type(each_liberty.group) is Unassigned:
 #                 print("    trying liberty",each_liberty.coords)
                 can_extend = True
                 new_absorbed_orphans = set([])
-                for each_next_liberty in each_liberty.liberties:
-                    if each_next_liberty in self.members: continue
+                for each_next_liberty in each_liberty.neighbours:
+                    if each_next_liberty.bit & member_mask: continue
                     if type(each_next_liberty.group) is Island:
                         if each_next_liberty.group is not self.group:
                             can_extend = False
@@ -760,47 +1178,38 @@ class IslandPath(Path):
                 if new_path_length + self.get_absorbed_orphan_count(missing_required_orphans)+int(bool(missing_required_orphans))>self.group.missing_cell_count():
                     can_extend=False
                 if can_extend:
-                    new_path_members = self.members.copy()
-                    new_path_members.add(each_liberty)
-                    new_path_absorbed_orphans = self._absorbed_orphans.copy()
+                    if new_absorbed_orphans:
+                        new_path_absorbed_orphans = self._absorbed_orphans | new_absorbed_orphans
+                    else:
+                        new_path_absorbed_orphans = self._absorbed_orphans
 #                     print("    making new path",self,"with",each_liberty.coords)
-                    new_path_absorbed_orphans.update(new_absorbed_orphans)
-                    if new_path_length == self.group.missing_cell_count():
-                        # if terminated, check for pool
-                        # Note: this rough calculation of the set of liberties that would turn nurikabe 
-                        #   might include island cells or orphan island cells but that's ok because they won't get counted when pool checking
-                        nurikabe_neighbors = self.liberties.copy()
-                        nurikabe_neighbors.update(each_liberty.liberties)
-                        nurikabe_neighbors.difference_update(new_path_members)
-                        for each_pool in Cell.get_all_possible_pools_from_cells(nurikabe_neighbors):
-                            if each_pool.check_if_path_causes_pool(nurikabe_neighbors):
-                                continue
-                    self.group.add_path_left(new_path_members,absorbed_orphans = new_path_absorbed_orphans)
+                    # the pool check that used to be here never rejected a path (its continue only moved on to the
+                    #   next pool), so it is left out rather than copying the liberty set for every terminated path
+                    self.group.add_path_left(member_mask | each_liberty.bit,absorbed_orphans = new_path_absorbed_orphans)
 
 
 class NurikabePath(Path):
+    __slots__ = ()
     def check_terminated(self):
         for each_cell in self.liberties:
             if type(each_cell.group) is Nurikabe and each_cell.group is not self.group:
                 self._terminated = True
                 return
     def update_liberties(self):
-        super().update_liberties()
-        self._liberties.update(self.group.liberties)
-        self._liberties.difference_update(self.members)
-        self._liberties.difference_update(self.group.members)
+        group = self._group
+        liberty_mask = group.liberty_mask
+        for each_cell in self.members:
+            liberty_mask |= each_cell.neighbour_mask
+        self._liberty_mask = liberty_mask & ~(self._member_mask | group.member_mask)
             
     def extend(self):
 #         print("  extending path",self)
+        member_mask = self._member_mask
         for each_liberty in self.liberties:
             if type(each_liberty.group) is Unassigned:
 #                 print("    trying liberty",each_liberty.coords)
-                new_path_members = self.members.copy()
-                new_path_members.add(each_liberty)
-                for each_pool in Cell.get_all_possible_pools_from_cells(new_path_members):
-                    if each_pool.check_if_path_causes_pool(new_path_members):
-                        continue
-                self.group.add_path_left(new_path_members)
+                # as for island paths, the pool check here never rejected anything so it has been dropped
+                self.group.add_path_left(member_mask | each_liberty.bit)
 
 
 class PossiblePool(CellGroup):
@@ -813,88 +1222,644 @@ class PossiblePool(CellGroup):
         for each_cell in self.members:
             each_cell.remove_possible_pool(self)
         self._members.clear()
+        self._member_mask = 0
         self.board.del_group(self)
     def check_for_forced_island(self):
         if self.count_nurikabe_cells()==3:
             for each_cell in self.members:
                 if type(each_cell.group) is Unassigned:
-                    self.board.queue_island_cell(each_cell)
-    def check_if_path_causes_pool(self,path_nurikabe_cells):
-        if self.count_nurikabe_cells(path_nurikabe_cells)==4:
-            return True
-        return False
-    def count_nurikabe_cells(self,path_nurikabe_cells=None):
+                    self.board.queue_island_cell(each_cell,CellQueue.FORCED)
+    def count_nurikabe_cells(self):
         count = 0
         for each_cell in self.members:
             if type(each_cell.group) is Nurikabe:
                 count +=1
-        if path_nurikabe_cells is not None:
-            overlap = self.members.intersection(path_nurikabe_cells)
-            for each_cell in overlap:
-                if type(each_cell.group) is Unassigned:
-                    count +=1
         return count
 
+class SolveStats():
+    # timings and counters for one Board.solve - wall time per deduction step, and how much path and queue work was done
+    def __init__(self):
+        self.elapsed = 0.0
+        self.step_times = {}
+        self.step_calls = {}
+        self.paths_built = 0
+        self.paths_pruned = 0
+        self.cells_queued = 0
+        self.max_queue_depth = 0
+        self.queue_depth_samples = 0
+        self.queue_depth_total = 0
+        self.invalidations = 0
+        self.steps_skipped = 0
+        self.shapes_streamed = 0
+        self.search_nodes = 0
+        self.solved = False
+        self.unassigned = None
+        self.contradiction = None
+
+    def record_step(self,step_name,elapsed):
+        self.step_times[step_name] = self.step_times.get(step_name,0.0) + elapsed
+        self.step_calls[step_name] = self.step_calls.get(step_name,0) + 1
+
+    def record_queue_depth(self,depth):
+        self.queue_depth_samples += 1
+        self.queue_depth_total += depth
+        if depth > self.max_queue_depth:
+            self.max_queue_depth = depth
+    @property
+    def mean_queue_depth(self):
+        if not self.queue_depth_samples: return 0.0
+        return self.queue_depth_total/self.queue_depth_samples
+
+    def as_dict(self):
+        return {"elapsed_ms":round(self.elapsed*1000,3),
+                "solved":self.solved,
+                "unassigned":self.unassigned,
+                "contradiction":self.contradiction,
+                "steps":{step_name:{"calls":self.step_calls[step_name],"ms":round(step_time*1000,3)} for step_name,step_time in self.step_times.items()},
+                "paths_built":self.paths_built,
+                "paths_pruned":self.paths_pruned,
+                "cells_queued":self.cells_queued,
+                "max_queue_depth":self.max_queue_depth,
+                "mean_queue_depth":round(self.mean_queue_depth,3),
+                "invalidations":self.invalidations,
+                "steps_skipped":self.steps_skipped,
+                "shapes_streamed":self.shapes_streamed,
+                "search_nodes":self.search_nodes}
+
+    def report(self):
+        report_lines = ["{:<60} {:>8} {:>12}".format("step","calls","ms")]
+        for step_name,step_time in sorted(self.step_times.items(),key=lambda each_item: -each_item[1]):
+            report_lines.append("{:<60} {:>8} {:>12.3f}".format(step_name,self.step_calls[step_name],step_time*1000))
+        report_lines.append("paths built {}, paths pruned {}, cells queued {}, invalidations {}, search nodes {}".format(
+            self.paths_built,self.paths_pruned,self.cells_queued,self.invalidations,self.search_nodes))
+        report_lines.append("queue depth max {}, mean {:.2f}, group steps skipped as clean {}, island shapes streamed {}".format(
+            self.max_queue_depth,self.mean_queue_depth,self.steps_skipped,self.shapes_streamed))
+        report_lines.append("elapsed time: {:.3f} ms.".format(self.elapsed*1000))
+        return '\n'.join(report_lines)
+
+
+class BoardState():
+    # compact, picklable record of a board: the kind of group each cell is in, which clue each island
+    #   cell belongs to, and the pending cell queues with their priorities.  paths and reach caches are left out and get rebuilt.
+    UNASSIGNED = 0
+    ISLAND = 1
+    ORPHAN_ISLAND = 2
+    NURIKABE = 3
+    def __init__(self,kinds,island_ids,closed_island_ids,required_orphans,island_queue,nurikabe_queue,contradiction=None):
+        self.kinds = kinds
+        self.island_ids = island_ids
+        self.closed_island_ids = closed_island_ids
+        self.required_orphans = required_orphans
+        self.island_queue = island_queue
+        self.nurikabe_queue = nurikabe_queue
+        self.contradiction = contradiction
+
+
+class BoardTopology():
+    # everything about a board that depends only on its size, worked out once per size and shared by every board
+    #   of that size.  cells are given by index (y*X + x): each cell's neighbours, in the same left, up, right,
+    #   down order as Cell.neighbours, and their mask, the 2x2 pool windows, the masks of the windows each cell is
+    #   in, and the column masks Board.spread_mask uses so a shifted row doesn't wrap onto the next
+    _by_size = {}
+    @staticmethod
+    def for_size(X,Y):
+        if (X,Y) not in BoardTopology._by_size:
+            BoardTopology._by_size[(X,Y)] = BoardTopology(X,Y)
+        return BoardTopology._by_size[(X,Y)]
+    def __init__(self,X,Y):
+        self.X = X
+        self.Y = Y
+        neighbours = []
+        for index in range(X*Y):
+            x = index % X
+            y = index // X
+            cell_neighbours = []
+            if x > 0: cell_neighbours.append(index-1)
+            if y > 0: cell_neighbours.append(index-X)
+            if x < X-1: cell_neighbours.append(index+1)
+            if y < Y-1: cell_neighbours.append(index+X)
+            neighbours.append(tuple(cell_neighbours))
+        self.neighbours = tuple(neighbours)
+        self.neighbour_masks = tuple(sum(1 << each_index for each_index in cell_neighbours) for cell_neighbours in neighbours)
+        # each window starts from its bottom right cell, as the board used to build them
+        windows = []
+        for y in range(1,Y):
+            for x in range(1,X):
+                index = y*X+x
+                windows.append((index,index-1,index-X,index-X-1))
+        self.windows = tuple(windows)
+        window_masks_by_bit = {}
+        for each_window in windows:
+            window_mask = sum(1 << each_index for each_index in each_window)
+            for each_index in each_window:
+                window_masks_by_bit.setdefault(1 << each_index,[]).append(window_mask)
+        self.window_masks_by_bit = window_masks_by_bit
+        self.all_mask = (1 << (X*Y))-1
+        self.not_first_column_mask = self.all_mask
+        self.not_last_column_mask = self.all_mask
+        for y in range(Y):
+            self.not_first_column_mask &= ~(1 << (y*X))
+            self.not_last_column_mask &= ~(1 << (y*X+X-1))
+
+
+def default_cache_dir():
+    return os.environ.get("NURIKABE_CACHE_DIR",os.path.join(os.path.expanduser("~"),".cache","nurikabesolver"))
+
+
+class PolyominoLibrary():
+    # every fixed polyomino (rotations and reflections counted as different shapes) up to max_size cells, as
+    #   sorted tuples of (x, y) offsets from the top left corner, each paired with the offsets of the cells around it.
+    #   each size is grown from the one below it, and the whole table is pickled to cache_path so later runs (and
+    #   other boards in this run) just load it.  placements of the most recently used (board size, cell, island
+    #   size) keys are kept, up to max_placements of them in all - one key of a big island can hold hundreds of
+    #   thousands
+    VERSION = 1
+    _by_max_size = {}
+    def __init__(self,max_size=6,cache_path=None,max_placements=200000):
+        self._max_size = max_size
+        self._cache_path = cache_path if cache_path is not None else PolyominoLibrary.default_cache_path(max_size)
+        self._shapes = None
+        self._placements = OrderedDict()
+        self._placement_count = 0
+        self._max_placements = max_placements
+    @classmethod
+    def for_max_size(cls,max_size):
+        # the shared library for boards using shapes up to max_size cells
+        if max_size not in cls._by_max_size:
+            cls._by_max_size[max_size] = cls(max_size)
+        return cls._by_max_size[max_size]
+    @staticmethod
+    def default_cache_path(max_size):
+        # one file per max_size, so a run with small tables doesn't overwrite a big one
+        return os.path.join(default_cache_dir(),"polyominoes-{}.pickle".format(max_size))
+    @property
+    def max_size(self):
+        return self._max_size
+    def shapes(self,size):
+        if self._shapes is None:
+            self._shapes = self.load()
+            if self._shapes is None:
+                self._shapes = self.build()
+                self.save()
+        return self._shapes[size]
+    def placements(self,X,Y,x,y,size):
+        # every shape of this size translated so that one of its cells lands on (x, y) of an X by Y board, as
+        #   (member mask, liberty mask) pairs.  these only depend on the board's dimensions, so boards share them
+        key = (X,Y,x,y,size)
+        if key in self._placements:
+            self._placements.move_to_end(key)
+            return self._placements[key]
+        placements = []
+        for each_shape,each_neighbours in self.shapes(size):
+            for anchor_x,anchor_y in each_shape:
+                delta_x = x-anchor_x
+                delta_y = y-anchor_y
+                shape_mask = 0
+                for shape_x,shape_y in each_shape:
+                    shape_x += delta_x
+                    shape_y += delta_y
+                    if shape_x < 0 or shape_y < 0 or shape_x >= X or shape_y >= Y: break
+                    shape_mask |= 1 << (shape_y*X+shape_x)
+                else:
+                    # neighbours off the edge of the board just aren't liberties
+                    liberty_mask = 0
+                    for shape_x,shape_y in each_neighbours:
+                        shape_x += delta_x
+                        shape_y += delta_y
+                        if 0 <= shape_x < X and 0 <= shape_y < Y:
+                            liberty_mask |= 1 << (shape_y*X+shape_x)
+                    placements.append((shape_mask,liberty_mask))
+        # too many to keep at all, it's made again next time
+        if len(placements) > self._max_placements: return placements
+        self._placements[key] = placements
+        self._placement_count += len(placements)
+        while self._placement_count > self._max_placements:
+            oldest_key,oldest_placements = self._placements.popitem(last=False)
+            self._placement_count -= len(oldest_placements)
+        return placements
+    @staticmethod
+    def neighbours_of(cells):
+        neighbours = set()
+        for x,y in cells:
+            neighbours.update(((x+1,y),(x-1,y),(x,y+1),(x,y-1)))
+        return tuple(sorted(neighbours.difference(cells)))
+    @staticmethod
+    def normalised(cells):
+        min_x = min(each_x for each_x,each_y in cells)
+        min_y = min(each_y for each_x,each_y in cells)
+        return tuple(sorted((each_x-min_x,each_y-min_y) for each_x,each_y in cells))
+    def build(self):
+        shapes = {1:[(((0,0),),PolyominoLibrary.neighbours_of(((0,0),)))]}
+        for size in range(2,self._max_size+1):
+            grown = set()
+            for each_shape,each_neighbours in shapes[size-1]:
+                cells = set(each_shape)
+                for each_neighbour in each_neighbours:
+                    grown.add(PolyominoLibrary.normalised(cells | {each_neighbour}))
+            shapes[size] = [(each_shape,PolyominoLibrary.neighbours_of(each_shape)) for each_shape in sorted(grown)]
+        logger.debug("built %d polyominoes up to size %d",sum(len(each_list) for each_list in shapes.values()),self._max_size)
+        return shapes
+    def load(self):
+        # a missing, stale or damaged cache just means building the table again
+        try:
+            with open(self._cache_path,'rb') as cache_file:
+                version,shapes = pickle.load(cache_file)
+        except (OSError,EOFError,pickle.UnpicklingError,ValueError,TypeError):
+            return None
+        if version != PolyominoLibrary.VERSION or not all(each_size in shapes for each_size in range(1,self._max_size+1)):
+            return None
+        return shapes
+    def save(self):
+        # written to a temporary file and renamed, so parallel workers never read half a table
+        temp_path = self._cache_path+".{}.tmp".format(os.getpid())
+        try:
+            os.makedirs(os.path.dirname(self._cache_path),exist_ok=True)
+            with open(temp_path,'wb') as cache_file:
+                pickle.dump((PolyominoLibrary.VERSION,self._shapes),cache_file,protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path,self._cache_path)
+        except OSError:
+            logger.debug("couldn't write the polyomino cache to %s",self._cache_path)
+
+# bump whenever a solver change could give different solutions or stats, or the cache keys change, so cached
+#   results get thrown away
+SOLVER_VERSION = 2
+
+class SolutionCache():
+    # finished results (solved or no solution - unsolved ones depend on the search options) kept in SQLite, keyed by
+    #   a hash of the puzzle's canonical clues, so a rotated or mirrored copy of a solved puzzle is a hit too.
+    #   the solution is stored in the canonical orientation and turned back on the way out.  rows from another
+    #   SOLVER_VERSION are dropped on opening, and the least recently used go once there are more than max_entries
+    def __init__(self,path=None,max_entries=100000):
+        self._path = path if path is not None else SolutionCache.default_cache_path()
+        self._max_entries = max_entries
+        if os.path.dirname(self._path):
+            os.makedirs(os.path.dirname(self._path),exist_ok=True)
+        self._connection = sqlite3.connect(self._path,timeout=30)
+        self._hits = 0
+        self._misses = 0
+        with self._connection:
+            self._connection.execute("CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value TEXT NOT NULL)")
+            self._connection.execute("CREATE TABLE IF NOT EXISTS solutions (key TEXT PRIMARY KEY, result TEXT NOT NULL, last_used REAL NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS solutions_by_last_used ON solutions (last_used)")
+            row = self._connection.execute("SELECT value FROM meta WHERE name = 'solver_version'").fetchone()
+            if row is None or row[0] != str(SOLVER_VERSION):
+                logger.info("solution cache %s is from solver version %s, clearing it",self._path,None if row is None else row[0])
+                self._connection.execute("DELETE FROM solutions")
+                self._connection.execute("INSERT OR REPLACE INTO meta (name, value) VALUES ('solver_version', ?)",(str(SOLVER_VERSION),))
+            self._entries = self._connection.execute("SELECT COUNT(*) FROM solutions").fetchone()[0]
+            self.evict()
+    @staticmethod
+    def default_cache_path():
+        return os.path.join(default_cache_dir(),"solutions.sqlite")
+    @staticmethod
+    def key(X,Y,clues):
+        return hashlib.sha256(struct.pack("<HH",X,Y)+clues).hexdigest()
+    @property
+    def path(self):
+        return self._path
+    @property
+    def hits(self):
+        return self._hits
+    @property
+    def misses(self):
+        return self._misses
+    def __len__(self):
+        return self._entries
+
+    def get(self,puzzle):
+        # the stored result for this puzzle (in its own orientation), or None.  puzzle is board_str lines or a
+        #   CorpusPuzzle
+        start_time = time.perf_counter()
+        canonical_clues,transform = canonical_form(puzzle)
+        key = SolutionCache.key(*canonical_clues)
+        row = self._connection.execute("SELECT result FROM solutions WHERE key = ?",(key,)).fetchone()
+        if row is None:
+            self._misses += 1
+            return None
+        self._hits += 1
+        with self._connection:
+            self._connection.execute("UPDATE solutions SET last_used = ? WHERE key = ?",(time.time(),key))
+        stored = json.loads(row[0])
+        return {"status":stored["status"],
+                "elapsed_ms":round((time.perf_counter()-start_time)*1000,3),
+                "unassigned":stored["unassigned"],
+                "solution":untransform_lines(stored["solution"],transform),
+                "stats":stored["stats"],
+                "cached":True}
+
+    def put(self,puzzle,result):
+        if result.get("status") not in ("solved","no solution"): return
+        canonical_clues,transform = canonical_form(puzzle)
+        stored = {"status":result["status"],
+                  "unassigned":result["unassigned"],
+                  "solution":transform_lines(result["solution"],transform),
+                  "stats":result["stats"]}
+        row = (json.dumps(stored),time.time(),SolutionCache.key(*canonical_clues))
+        with self._connection:
+            if self._connection.execute("UPDATE solutions SET result = ?, last_used = ? WHERE key = ?",row).rowcount == 0:
+                self._connection.execute("INSERT INTO solutions (result, last_used, key) VALUES (?, ?, ?)",row)
+                self._entries += 1
+            self.evict()
+
+    def evict(self):
+        if self._entries > self._max_entries:
+            self._connection.execute("DELETE FROM solutions WHERE key IN (SELECT key FROM solutions ORDER BY last_used LIMIT ?)",
+                                     (self._entries-self._max_entries,))
+            self._entries = self._max_entries
+
+    def clear(self):
+        with self._connection:
+            self._connection.execute("DELETE FROM solutions")
+        self._entries = 0
+
+    def close(self):
+        self._connection.close()
+
+
+class CorpusPuzzle():
+    # one puzzle of a PuzzleCorpus.  clues and walls are memoryviews straight into the mapped file, so they're only
+    #   good while the corpus is open - take bytes() of them to keep them longer
+    __slots__ = ('X','Y','clues','walls')
+    def __init__(self,X,Y,clues,walls=None):
+        self.X = X
+        self.Y = Y
+        self.clues = clues
+        self.walls = walls
+    def board(self,**board_options):
+        return Board.from_clues(self.X,self.Y,self.clues,**board_options)
+    def board_str_lines(self):
+        return clue_lines(self.X,self.Y,self.clues)
+    def detached(self):
+        # a copy holding bytes rather than views, so it outlives the corpus and can be sent to another process
+        return CorpusPuzzle(self.X,self.Y,bytes(self.clues),None if self.walls is None else bytes(self.walls))
+    def wall_mask(self):
+        # the solution's walls as a board mask (bit y*X+x), or None if there's no solution stored
+        if self.walls is None: return None
+        return int.from_bytes(self.walls,'little')
+    def solution_lines(self):
+        # the solution in the same format as Board.grid_lines
+        wall_mask = self.wall_mask()
+        if wall_mask is None: return None
+        return [''.join(Island.count_to_character(self.clues[y*self.X+x]) if self.clues[y*self.X+x]
+                        else ('X' if wall_mask >> (y*self.X+x) & 1 else 'O') for x in range(self.X)) for y in range(self.Y)]
+
+
+class PuzzleCorpus():
+    # a packed binary (.nkb) file of puzzles, read through mmap so a batch over millions of them neither parses text
+    #   nor copies clues.  the file is MAGIC, then one record per puzzle: RECORD_HEADER (width, height, flags), the
+    #   clue counts as one byte per cell in row order (0 for a plain cell), then, if flags has HAS_SOLUTION, the
+    #   solution's walls as a little-endian mask of (X*Y+7)//8 bytes with bit y*X+x set for a wall - the same bit
+    #   order as the board's own masks.  see CorpusWriter
+    MAGIC = b"NKB\x01"
+    RECORD_HEADER = struct.Struct("<HHB")
+    HAS_SOLUTION = 1
+    def __init__(self,path):
+        self._path = path
+        self._offsets = None
+        with open(path,'rb') as corpus_file:
+            if os.fstat(corpus_file.fileno()).st_size < len(PuzzleCorpus.MAGIC):
+                raise ValueError(path+" isn't a nurikabe corpus")
+            self._mmap = mmap.mmap(corpus_file.fileno(),0,access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+        if self._view[:len(PuzzleCorpus.MAGIC)] != PuzzleCorpus.MAGIC:
+            self.close()
+            raise ValueError(path+" isn't a nurikabe corpus")
+    def __enter__(self):
+        return self
+    def __exit__(self,*exc_info):
+        self.close()
+    def close(self):
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # puzzles still hold views into it - it goes when they do
+            pass
+
+    def record_at(self,offset):
+        # the puzzle whose record starts at offset, and the offset of the next one
+        if offset + PuzzleCorpus.RECORD_HEADER.size > len(self._view):
+            raise ValueError(self._path+" is truncated at byte "+str(offset))
+        X,Y,flags = PuzzleCorpus.RECORD_HEADER.unpack_from(self._view,offset)
+        clues_start = offset + PuzzleCorpus.RECORD_HEADER.size
+        walls_start = clues_start + X*Y
+        end = walls_start + ((X*Y+7)//8 if flags & PuzzleCorpus.HAS_SOLUTION else 0)
+        if end > len(self._view):
+            raise ValueError(self._path+" is truncated at byte "+str(offset))
+        walls = self._view[walls_start:end] if flags & PuzzleCorpus.HAS_SOLUTION else None
+        return CorpusPuzzle(X,Y,self._view[clues_start:walls_start],walls),end
+    def __iter__(self):
+        offset = len(PuzzleCorpus.MAGIC)
+        while offset < len(self._view):
+            puzzle,offset = self.record_at(offset)
+            yield puzzle
+    @property
+    def offsets(self):
+        # where each record starts, found by hopping from record to record the first time it's asked for
+        if self._offsets is None:
+            self._offsets = array('Q')
+            offset = len(PuzzleCorpus.MAGIC)
+            while offset < len(self._view):
+                self._offsets.append(offset)
+                puzzle,offset = self.record_at(offset)
+        return self._offsets
+    def __len__(self):
+        return len(self.offsets)
+    def __getitem__(self,index):
+        return self.record_at(self.offsets[index])[0]
+
+
+class CorpusWriter():
+    # appends puzzles, with their solutions if known, to a PuzzleCorpus file
+    def __init__(self,path):
+        self._file = open(path,'wb')
+        self._file.write(PuzzleCorpus.MAGIC)
+    def __enter__(self):
+        return self
+    def __exit__(self,*exc_info):
+        self.close()
+    def close(self):
+        self._file.close()
+    @staticmethod
+    def pack(puzzle,solution_lines=None):
+        # puzzle is board_str lines or a CorpusPuzzle
+        X,Y,clues = puzzle_clues(puzzle)
+        if solution_lines is None:
+            return PuzzleCorpus.RECORD_HEADER.pack(X,Y,0)+clues
+        wall_mask = 0
+        for y,line in enumerate(solution_lines):
+            for x,character in enumerate(line):
+                if character == 'X':
+                    wall_mask |= 1 << (y*X+x)
+        return PuzzleCorpus.RECORD_HEADER.pack(X,Y,PuzzleCorpus.HAS_SOLUTION)+clues+wall_mask.to_bytes((X*Y+7)//8,'little')
+    def write(self,puzzle,solution_lines=None):
+        self._file.write(CorpusWriter.pack(puzzle,solution_lines))
+
+
+class NumpyGrid():
+    # optional vectorised mirror of the board for big puzzles: an int8 array holding the BoardState kind of every
+    #   cell, kept in step as cells change.  pool checks become sliding 2x2 sums over it, so the board needs no
+    #   PossiblePool objects
+    KIND_BY_GROUP_TYPE = {Island:BoardState.ISLAND,OrphanIsland:BoardState.ORPHAN_ISLAND,Nurikabe:BoardState.NURIKABE}
+    def __init__(self,X,Y,clues):
+        self._X = X
+        self._Y = Y
+        self._kinds = numpy.zeros((Y,X),dtype=numpy.int8)
+        for each_cell,count in clues:
+            self._kinds[each_cell.y,each_cell.x] = BoardState.ISLAND
+    @property
+    def kinds(self):
+        return self._kinds
+    def set_kind(self,cell):
+        self._kinds[cell.y,cell.x] = NumpyGrid.KIND_BY_GROUP_TYPE.get(type(cell.group),BoardState.UNASSIGNED)
+    def load(self,kinds):
+        self._kinds = numpy.frombuffer(kinds,dtype=numpy.int8).reshape(self._Y,self._X).copy()
+    @staticmethod
+    def window_sums(cells):
+        # how many cells of each 2x2 window are set, indexed by the window's top left corner
+        cells = cells.astype(numpy.int8)
+        return cells[:-1,:-1] + cells[1:,:-1] + cells[:-1,1:] + cells[1:,1:]
+    def find_pool(self):
+        # (x, y) of the top left corner of a finished pool, or None
+        corners = numpy.argwhere(NumpyGrid.window_sums(self._kinds == BoardState.NURIKABE) == 4)
+        if not len(corners): return None
+        return int(corners[0][1]),int(corners[0][0])
+    def forced_island_cells(self,cell):
+        # indexes of the unassigned cell in each window around cell with three walls and no island in it - the
+        #   same cells PossiblePool.check_for_forced_island finds
+        x0 = max(cell.x-1,0)
+        y0 = max(cell.y-1,0)
+        kinds = self._kinds[y0:cell.y+2,x0:cell.x+2]
+        walls = NumpyGrid.window_sums(kinds == BoardState.NURIKABE)
+        islands = NumpyGrid.window_sums((kinds == BoardState.ISLAND) | (kinds == BoardState.ORPHAN_ISLAND))
+        forced = []
+        for window_y,window_x in numpy.argwhere((walls == 3) & (islands == 0)):
+            for delta_y,delta_x in numpy.argwhere(kinds[window_y:window_y+2,window_x:window_x+2] == BoardState.UNASSIGNED):
+                forced.append(int(y0+window_y+delta_y)*self._X + int(x0+window_x+delta_x))
+        return forced
+
+
 class Board():
-    def __init__(self,board_str_lines):
-        self._Y = len(board_str_lines)
-        self._X = len(board_str_lines[0]) #Assumed here that every line has the same number of chars
+    def __init__(self,board_str_lines=None,stream_shapes=False,stream_shape_limit=20000,use_numpy=False,path_workers=0,
+                 parallel_min_paths=1000,polyomino_size=6,nurikabe_path_limit=10000,clues=None,size=None):
+        # stream_shapes adds a step that streams each island's final shapes before its paths are built (see
+        #   stream_island_shapes); islands of up to polyomino_size cells take theirs from the polyomino library.
+        #   use_numpy keeps a NumpyGrid for pool checks, if numpy is installed.  path_workers > 0 extends the paths of
+        #   islands with at least parallel_min_paths paths on that many worker processes (see
+        #   build_island_paths_in_parallel).  nurikabe paths stop being extended once there are more than
+        #   nurikabe_path_limit of them - on open boards they multiply far faster than they find anything.  instead
+        #   of board_str_lines, clues can be the row-major clue counts (0 for a plain cell) of a board of size (X, Y)
+        #   - see from_clues
+        self._stream_shapes = stream_shapes
+        self._stream_shape_limit = stream_shape_limit
+        self._polyominoes = PolyominoLibrary.for_max_size(polyomino_size)
+        self._nurikabe_path_limit = nurikabe_path_limit
+        if use_numpy and numpy is None:
+            logger.warning("numpy isn't installed, using the pure Python engine")
+        self._use_numpy = use_numpy and numpy is not None
+        self._grid = None
+        if board_str_lines is not None:
+            self._board_str_lines = list(board_str_lines)
+            self._Y = len(board_str_lines)
+            self._X = len(board_str_lines[0]) #Assumed here that every line has the same number of chars
+            clue_counts = [Island.character_to_count(character) for line in board_str_lines for character in line]
+        else:
+            # made from the counts when a path worker needs them
+            self._board_str_lines = None
+            self._X,self._Y = size
+            clue_counts = bytes(clues)
+        self._clue_counts = clue_counts
+        self._path_workers = path_workers
+        self._parallel_min_paths = parallel_min_paths
+        self._path_executor = None
+        self._cells = []
         self._islands = []
         self._orphan_islands = []
         self._complete_islands = []
         self._nurikabe = []
         self._unassigned = []
         self._possible_pools = []
-        self._island_cell_queue = deque()
-        self._nurikabe_cell_queue = deque()
+        self._clues = []
+        self._clue_islands = []
+        self._pool_windows = []
+        self._topology = BoardTopology.for_size(self._X,self._Y)
+        self._island_cell_queue = CellQueue()
+        self._nurikabe_cell_queue = CellQueue()
         self._current_island_path_length = 0
         self._current_nurikabe_path_length = 0
-        print("initializing board")
-        board_rows = []
-        y=0
-        for line in board_str_lines:
-#             print(line)
-            board_row = []
-            x=0
-            for character in line:
-                new_group = None
-                count = Island.character_to_count(character)
-                if count:
-                    new_group = Island(self, count = count)
-                    self._islands.append(new_group)
-                else:
-                    new_group = Unassigned(self)
-                    self._unassigned.append(new_group)
-                new_cell = Cell(new_group,x,y)
-                board_row.append(new_cell)
-                if x>0:
-                    previous_cell = board_row[x-1]
-                    new_cell.add_liberty(previous_cell)
-                    previous_cell.add_liberty(new_cell)
-                if y>0:
-                    above_cell = board_rows[y-1][x]
-                    new_cell.add_liberty(above_cell)
-                    above_cell.add_liberty(new_cell)
-                    if x>0:
-                        pool_cell1 = new_cell
-                        pool_cell2 = board_row[x-1]
-                        pool_cell3 = above_cell
-                        pool_cell4 = board_rows[y-1][x-1]
-                        if type(pool_cell1.group) is not Island and type(pool_cell2.group) is not Island and type(pool_cell3.group) is not Island and type(pool_cell4.group) is not Island:
-                            possible_pool = PossiblePool(self)
-                            possible_pool.add_member(pool_cell1)
-                            possible_pool.add_member(pool_cell2)
-                            possible_pool.add_member(pool_cell3)
-                            possible_pool.add_member(pool_cell4)
-                            self._possible_pools.append(possible_pool)
-                x += 1
-            board_rows.append(board_row)
-            y += 1
-#         print("  initial island liberty update")
-        self.update_group_liberties()
+        self._contradiction = None
+        self._search_nodes_left = 0
+        self._step_memo = {}
+        self._island_reach_masks = None
+        self._island_reach_key = None
+        self._articulation_key = None
+        self._stats = SolveStats()
+        logger.debug("initializing board")
+        for index,count in enumerate(clue_counts):
+            new_group = None
+            if count:
+                new_group = Island(self, count = count)
+                self._islands.append(new_group)
+                self._clue_islands.append(new_group)
+            else:
+                new_group = Unassigned(self)
+                self._unassigned.append(new_group)
+            new_cell = Cell(new_group,index % self._X,index // self._X,index=index)
+            self._cells.append(new_cell)
+            if count:
+                self._clues.append((new_cell,count))
+        for each_cell in self._cells:
+            for each_index in self._topology.neighbours[each_cell.index]:
+                each_cell.add_neighbour(self._cells[each_index])
+        for each_window in self._topology.windows:
+            pool_cells = tuple(self._cells[each_index] for each_index in each_window)
+            self._pool_windows.append(pool_cells)
+            for each_cell in pool_cells:
+                if type(each_cell.group) is Island: break
+            else:
+                self.create_possible_pool(pool_cells)
+        if self._use_numpy:
+            self._grid = NumpyGrid(self._X,self._Y,self._clues)
+    @classmethod
+    def from_clues(cls,X,Y,clues,**board_options):
+        # a board straight from X*Y row-major clue counts, 0 for a plain cell - any bytes-like will do, such as the
+        #   clues of a CorpusPuzzle - so no puzzle text is parsed
+        if len(clues) != X*Y:
+            raise ValueError("expected "+str(X*Y)+" clue counts for a "+str(X)+"x"+str(Y)+" board, got "+str(len(clues)))
+        return cls(clues=clues,size=(X,Y),**board_options)
+    @property
+    def board_str_lines(self):
+        if self._board_str_lines is None:
+            self._board_str_lines = clue_lines(self._X,self._Y,self._clue_counts)
+        return self._board_str_lines
     @property
     def islands(self):
         return self._islands
+    @property
+    def cells(self):
+        return self._cells
+    @property
+    def polyominoes(self):
+        return self._polyominoes
+    @property
+    def stats(self):
+        return self._stats
+
+    def spread_mask(self,mask):
+        # the cells next to mask and not in it, found by shifting the whole mask a row or column at a time
+        topology = self._topology
+        spread = (mask << 1) & topology.not_first_column_mask
+        spread |= (mask >> 1) & topology.not_last_column_mask
+        spread |= (mask << topology.X) & topology.all_mask
+        spread |= mask >> topology.X
+        return spread & ~mask
+    def cells_from_mask(self,mask):
+        cells = set([])
+        while mask:
+            low_bit = mask & -mask
+            cells.add(self._cells[low_bit.bit_length()-1])
+            mask ^= low_bit
+        return cells
     
     def __str__(self):
         board_rows = [[' ' for i in range(0,10 + 3*self._X)] for j in range(0,self._Y)]
@@ -913,9 +1878,124 @@ class Board():
             board_lines.append(' '.join(each_row))
         return '\n'+'\n'.join(board_lines)
 
+    def grid_lines(self):
+        # the board in the same format as the puzzle text, with O for island cells and X for nurikabe
+        return [''.join(str(self._cells[y*self._X + x]) for x in range(0,self._X)) for y in range(0,self._Y)]
+
     def count_nurikabe(self):
         return len(self._nurikabe)
 
+    def create_possible_pool(self,pool_cells):
+        # the numpy grid checks every window itself
+        if self._use_numpy: return
+        possible_pool = PossiblePool(self)
+        for each_cell in pool_cells:
+            possible_pool.add_member(each_cell)
+        self._possible_pools.append(possible_pool)
+
+    def snapshot(self):
+        # O(cells) record of the board, without any path or reach caches - see restore
+        clue_ids = {}
+        for clue_id,each_island in enumerate(self._clue_islands):
+            clue_ids[each_island] = clue_id
+        kinds = bytearray(len(self._cells))
+        island_ids = array('h',[-1])*len(self._cells)
+        for each_cell in self._cells:
+            group_type = type(each_cell.group)
+            if group_type is Island:
+                kinds[each_cell.index] = BoardState.ISLAND
+                island_ids[each_cell.index] = clue_ids[each_cell.group]
+            elif group_type is OrphanIsland:
+                kinds[each_cell.index] = BoardState.ORPHAN_ISLAND
+            elif group_type is Nurikabe:
+                kinds[each_cell.index] = BoardState.NURIKABE
+        closed_island_ids = tuple(clue_ids[each_island] for each_island in self._complete_islands)
+        required_orphans = []
+        for each_island in self._islands:
+            for each_orphan in each_island.required_absorbed_orphans:
+                if each_orphan.members:
+                    required_orphans.append((clue_ids[each_island],next(iter(each_orphan.members)).index))
+        return BoardState(bytes(kinds),island_ids,closed_island_ids,tuple(required_orphans),
+                          tuple((each_cell.index,priority) for each_cell,priority in self._island_cell_queue.items()),
+                          tuple((each_cell.index,priority) for each_cell,priority in self._nurikabe_cell_queue.items()),
+                          self._contradiction)
+
+    def restore(self,state):
+        # rebuild every group from a snapshot, reusing the cells so the puzzle text isn't parsed again
+        kinds = state.kinds
+        if self._grid is not None:
+            self._grid.load(kinds)
+        self._islands = []
+        self._orphan_islands = []
+        self._complete_islands = []
+        self._nurikabe = []
+        self._unassigned = []
+        self._possible_pools = []
+        self._clue_islands = [Island(self,count=count) for each_cell,count in self._clues]
+        cell_groups = [None]*len(self._cells)
+        # clue cells go first, so each island keeps its clue as its starting cell
+        for (each_cell,count),each_island in zip(self._clues,self._clue_islands):
+            each_cell.reset(each_island)
+            cell_groups[each_cell.index] = each_island
+        for each_cell in self._cells:
+            if cell_groups[each_cell.index] is not None: continue
+            kind = kinds[each_cell.index]
+            if kind == BoardState.ISLAND:
+                cell_groups[each_cell.index] = self._clue_islands[state.island_ids[each_cell.index]]
+                each_cell.reset(cell_groups[each_cell.index])
+                continue
+            if kind == BoardState.UNASSIGNED:
+                new_group = Unassigned(self)
+                self._unassigned.append(new_group)
+            elif kind == BoardState.ORPHAN_ISLAND:
+                new_group = OrphanIsland(self)
+                self._orphan_islands.append(new_group)
+            else:
+                new_group = Nurikabe(self)
+                self._nurikabe.append(new_group)
+            cell_groups[each_cell.index] = new_group
+            each_cell.reset(new_group)
+            if kind == BoardState.UNASSIGNED: continue
+            # orphan islands and nurikabe are the connected regions of cells of the same kind
+            region = [each_cell]
+            while region:
+                region_cell = region.pop()
+                for each_neighbour in region_cell.neighbours:
+                    if cell_groups[each_neighbour.index] is None and kinds[each_neighbour.index] == kind:
+                        cell_groups[each_neighbour.index] = new_group
+                        each_neighbour.reset(new_group)
+                        region.append(each_neighbour)
+        for each_cell in self._cells:
+            each_cell.restore_links(kinds)
+        for each_window in self._pool_windows:
+            for each_cell in each_window:
+                if kinds[each_cell.index] == BoardState.ISLAND or kinds[each_cell.index] == BoardState.ORPHAN_ISLAND:
+                    break
+            else:
+                self.create_possible_pool(each_window)
+        closed_island_ids = set(state.closed_island_ids)
+        for clue_id,each_island in enumerate(self._clue_islands):
+            if clue_id in closed_island_ids:
+                self._complete_islands.append(each_island)
+            else:
+                self._islands.append(each_island)
+        for each_island in self._complete_islands:
+            each_island.close_liberties()
+        for clue_id,orphan_cell_index in state.required_orphans:
+            self._clue_islands[clue_id].add_required_absorbed_orphan(cell_groups[orphan_cell_index])
+        self._island_cell_queue = CellQueue()
+        for each_index,priority in state.island_queue:
+            self._island_cell_queue.append(self._cells[each_index],priority)
+        self._nurikabe_cell_queue = CellQueue()
+        for each_index,priority in state.nurikabe_queue:
+            self._nurikabe_cell_queue.append(self._cells[each_index],priority)
+        self._current_island_path_length = 0
+        self._current_nurikabe_path_length = 0
+        self._contradiction = state.contradiction
+        self._step_memo = {}
+        self._island_reach_masks = None
+        self._articulation_key = None
+
     def create_new_nurikabe(self, starting_cell):
 #         print("  creating new nurikabe group at",starting_cell.coords)
         new_group = Nurikabe(self)
@@ -942,21 +2022,69 @@ class Board():
             self._possible_pools.remove(empty_group)
         
 
-    def queue_nurikabe_cell(self,queue_cell):
+    def queue_nurikabe_cell(self,queue_cell,priority=CellQueue.LOCAL):
         if type(queue_cell.group) is Unassigned and queue_cell not in self._nurikabe_cell_queue:
-            print("      queuing nurikabe cell",queue_cell.coords)
-            self._nurikabe_cell_queue.append(queue_cell)
+            logger.log(TRACE,"      queuing nurikabe cell %s",queue_cell.coords)
+            self._stats.cells_queued += 1
+            if queue_cell in self._island_cell_queue:
+                self.set_contradiction("cell "+str(queue_cell.coords)+" queued as both island and nurikabe")
+            self._nurikabe_cell_queue.append(queue_cell,priority)
+            self._stats.record_queue_depth(len(self._island_cell_queue)+len(self._nurikabe_cell_queue))
 
-    def queue_island_cell(self,queue_cell):
+    def queue_island_cell(self,queue_cell,priority=CellQueue.LOCAL):
         if type(queue_cell.group) is Unassigned and queue_cell not in self._island_cell_queue:
-            print("      queuing island cell",queue_cell.coords)
-            self._island_cell_queue.append(queue_cell)
+            logger.log(TRACE,"      queuing island cell %s",queue_cell.coords)
+            self._stats.cells_queued += 1
+            if queue_cell in self._nurikabe_cell_queue:
+                self.set_contradiction("cell "+str(queue_cell.coords)+" queued as both island and nurikabe")
+            self._island_cell_queue.append(queue_cell,priority)
+            self._stats.record_queue_depth(len(self._island_cell_queue)+len(self._nurikabe_cell_queue))
 
     def island_closed(self,closed_island):
         self._islands.remove(closed_island)
         self._complete_islands.append(closed_island)
 
+    @property
+    def contradiction(self):
+        return self._contradiction
+    def set_contradiction(self,reason):
+        # only the first contradiction is kept - anything after it is a consequence
+        if self._contradiction is None:
+            logger.debug("  contradiction: %s",reason)
+            self._contradiction = reason
+
+    def find_contradiction(self):
+        if self._contradiction is not None: return True
+        for each_island in self._islands:
+            if len(each_island.members) > each_island.count:
+                self.set_contradiction("island "+str(each_island)+" is too big")
+            elif not each_island.is_complete() and not each_island.liberties:
+                self.set_contradiction("island "+str(each_island)+" is incomplete with no liberties")
+            elif each_island.paths is not None and not each_island.paths:
+                self.set_contradiction("island "+str(each_island)+" has no possible paths")
+        if self._orphan_islands:
+            self.island_reach_masks()
+        for each_orphan in self._orphan_islands:
+            if not each_orphan.liberties:
+                self.set_contradiction("orphan island "+str(each_orphan)+" has no liberties")
+            elif not each_orphan.can_reach_any_island():
+                self.set_contradiction("orphan island "+str(each_orphan)+" can't reach any island")
+        if self.count_nurikabe() > 1:
+            for each_nurikabe in self._nurikabe:
+                if not each_nurikabe.liberties:
+                    self.set_contradiction("nurikabe "+str(each_nurikabe)+" is cut off")
+        for each_pool in self._possible_pools:
+            if each_pool.count_nurikabe_cells()==4:
+                self.set_contradiction("pool at "+str(each_pool))
+        if self._grid is not None:
+            pool_corner = self._grid.find_pool()
+            if pool_corner is not None:
+                self.set_contradiction("pool at "+str(pool_corner))
+        return self._contradiction is not None
+
     def is_solved(self):
+        if self._contradiction is not None:
+            return False
         if self.count_nurikabe()>1:
             return False
         if self._islands or self._orphan_islands:
@@ -965,47 +2093,156 @@ class Board():
             return False
         return True
             
-    def solve(self):
-        start_time = time.clock()
-        self.update()
-        self.clear_cell_queue()
-        self.mark_cant_reach() #only quick at this point, since no path info has been calculated
-        self.clear_cell_queue()
-        print()
-        print("starting path iteration..............................................")
+    def solve(self,search=False,node_budget=1000):
+        # search: if deduction stalls, fall back to hypothesis search of at most node_budget boards
+        # returns the SolveStats for this solve
+        self._stats = SolveStats()
+        start_time = time.perf_counter()
+        try:
+            self.deduce()
+            if search and not self.is_solved() and self._contradiction is None:
+                logger.debug("deduction stalled, starting hypothesis search..............................")
+                self.search(node_budget)
+        finally:
+            self.close_path_workers()
+        logger.info("%s",self)
+        if self.is_solved():
+            logger.info("solved!  :)")
+        elif self._contradiction is not None:
+            logger.info("no solution!  :(  %s",self._contradiction)
+        else:
+            logger.info("not solved!  :(  %d unassigned cells",len(self._unassigned))
+        self._stats.elapsed = time.perf_counter()-start_time
+        self._stats.solved = self.is_solved()
+        self._stats.unassigned = len(self._unassigned)
+        self._stats.contradiction = self._contradiction
+        logger.info("elapsed time: %.3f ms.",self._stats.elapsed*1000)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("%s",self._stats.report())
+        return self._stats
+
+    def deduce(self):
+        # run the deduction steps until the board is solved, a contradiction is found, or nothing more can be done
+        self.run_step(self.update)
+        self.run_step(self.clear_cell_queue)
+        self.run_step(self.mark_cant_reach) #only quick at this point, since no path info has been calculated
+        self.run_step(self.clear_cell_queue)
+        logger.debug("starting path iteration..............................................")
+        # wall connectivity is mostly covered by graph checks (articulation points, and island paths that would split
+        #   the walls), so nurikabe paths - whose number explodes on open boards - are only built once everything
+        #   else, island paths up to full length included, has stalled
         solution_steps = [self.close_completed_islands,
                           self.remove_island_paths_excluding_other_island_paths,
                           self.remove_nurikabe_paths_excluding_island_paths_and_vice_versa,
+                          self.remove_island_paths_splitting_walls,
                           self.calculate_slow_can_reach,
                           self.mark_cant_reach,
+                          self.mark_wall_articulation_points,
                           self.mark_must_reach,
                           self.island_path_overlaps,
                           self.nurikabe_path_overlaps,
+                          self.stream_island_shapes,
                           self.build_island_paths,
+                          self.increment_island_path_length,
                           self.build_nurikabe_paths,
-                          self.increment_nurikabe_path_length,
-                          self.increment_island_path_length]
+                          self.increment_nurikabe_path_length]
+        if not self._stream_shapes:
+            solution_steps.remove(self.stream_island_shapes)
         self._current_island_path_length = 1
         self._current_nurikabe_path_length = 1
         solution_step_index = 0
-        while not self.is_solved() and solution_step_index<len(solution_steps):
-            print("on step",solution_step_index,solution_steps[solution_step_index].__name__)
-            if solution_steps[solution_step_index]():
+        while not self.is_solved() and not self.find_contradiction() and solution_step_index<len(solution_steps):
+            logger.debug("on step %d %s",solution_step_index,solution_steps[solution_step_index].__name__)
+            if self.run_step(solution_steps[solution_step_index]):
                 # a solution step function should return true if it changed something important without queuing cells - e.g. incrementing path lengths
                 solution_step_index = 0
                 continue
             if self.has_queued_cells():
-                self.clear_cell_queue()
+                self.run_step(self.clear_cell_queue)
                 solution_step_index = 0
                 continue
             solution_step_index +=1
-        print(self)
-        if self.is_solved():
-            print("solved!  :)")
+        return self._contradiction is None
+
+    def step_is_clean(self,step_name,*groups,island_versions=None):
+        # true if the step last ran on these groups when they were at the same versions - same inputs, so
+        #   nothing new to find.  otherwise the current versions are recorded and the step has to run
+        versions = tuple(each_group.version for each_group in groups)
+        if island_versions is not None:
+            versions += island_versions
+        memo = self._step_memo.setdefault(step_name,{})
+        if memo.get(groups) == versions:
+            self._stats.steps_skipped += 1
+            return True
+        memo[groups] = versions
+        return False
+
+    def run_step(self,step):
+        start_time = time.perf_counter()
+        result = step()
+        self._stats.record_step(step.__name__,time.perf_counter()-start_time)
+        return result
+
+    def search(self,node_budget=1000):
+        # depth-first hypothesis search: each node assumes island or wall for one cell and runs the deduction
+        #   steps to a contradiction or a fixpoint, so the worst case is bounded by node_budget deductions
+        self._search_nodes_left = node_budget
+        root_state = self.snapshot()
+        solved = self.search_below(1)
+        logger.debug("  search finished with %d of %d nodes left",self._search_nodes_left,node_budget)
+        if not solved:
+            self.restore(root_state)
+            if self._search_nodes_left > 0:
+                self.set_contradiction("hypothesis search found no solution")
+        return solved
+
+    def search_below(self,depth):
+        cell_index = self.choose_search_cell()
+        if cell_index is None: return False
+        node_state = self.snapshot()
+        for make_island in (True,False):
+            if self._search_nodes_left <= 0: return False
+            self._search_nodes_left -= 1
+            self._stats.search_nodes += 1
+            logger.debug("  depth %d assuming cell %s is %s",depth,self._cells[cell_index].coords,"island" if make_island else "nurikabe")
+            self.restore(node_state)
+            self.assume(cell_index,make_island)
+            self.deduce()
+            if self._contradiction is not None: continue
+            if self.is_solved(): return True
+            if self.search_below(depth+1): return True
+        return False
+
+    def assume(self,cell_index,make_island):
+        if make_island:
+            self.queue_island_cell(self._cells[cell_index])
         else:
-            print("not solved!  :( ",len(self._unassigned),"unassigned cells")
-        elapsed_time = time.clock()-start_time
-        print ("elapsed time: {:.3f} ms.".format(elapsed_time*1000))
+            self.queue_nurikabe_cell(self._cells[cell_index])
+
+    def choose_search_cell(self):
+        # most constrained first: the island with the fewest paths, and the unassigned cell found in most of them
+        fewest_paths_island = None
+        for each_island in self._islands:
+            if not each_island.paths: continue
+            if fewest_paths_island is None or len(each_island.paths) < len(fewest_paths_island.paths):
+                fewest_paths_island = each_island
+        if fewest_paths_island is not None:
+            path_counts = {}
+            for each_path in fewest_paths_island.paths:
+                for each_cell in each_path.members:
+                    if type(each_cell.group) is Unassigned:
+                        path_counts[each_cell] = path_counts.get(each_cell,0) + 1
+            if path_counts:
+                return max(path_counts,key=lambda each_cell: (path_counts[each_cell],-each_cell.index)).index
+        # no paths to go on, so take a liberty of the island with the fewest liberties
+        for each_island in sorted(self._islands,key=lambda each_island: len(each_island.liberties)):
+            for each_liberty in sorted(each_island.liberties,key=lambda each_cell: each_cell.index):
+                if type(each_liberty.group) is Unassigned:
+                    return each_liberty.index
+        for each_cell in self._cells:
+            if type(each_cell.group) is Unassigned:
+                return each_cell.index
+        return None
         
     def get_max_island_path_length(self):
         length = 0
@@ -1018,12 +2255,117 @@ class Board():
         for each_island in self._islands:
             each_island.close_completed()
 
+    def island_reach_masks(self):
+        # for each incomplete island, the cells it could still grow into: a breadth first search from its members
+        #   that spends at most missing_cell_count cells and never steps onto a wall or next to another island.
+        #   reaching an orphan spends its whole size, since the island would have to take all of it.  every cell
+        #   change can only shrink these, so they're kept until the next one, and quick reach rebuilt from them
+        if self._island_reach_masks is not None and self._island_reach_key == len(self._unassigned):
+            return self._island_reach_masks
+        wall_mask = 0
+        for each_nurikabe in self._nurikabe:
+            wall_mask |= each_nurikabe.member_mask
+        island_mask = 0
+        for each_island in itertools.chain(self._islands,self._complete_islands):
+            island_mask |= each_island.member_mask
+        orphan_mask = 0
+        for each_orphan in self._orphan_islands:
+            orphan_mask |= each_orphan.member_mask
+        open_mask = self._topology.all_mask & ~(wall_mask | island_mask)
+        reach_masks = {}
+        for each_island in self._islands:
+            foreign_mask = island_mask & ~each_island.member_mask
+            island_open_mask = open_mask & ~self.spread_mask(foreign_mask)
+            budget = each_island.missing_cell_count()
+            reached_mask = each_island.member_mask
+            frontier_mask = reached_mask
+            # orphans the search has touched, and the cells spent by the time it is through each of them
+            touched_mask = 0
+            arrivals = {}
+            for spent in range(1,budget+1):
+                step_mask = self.spread_mask(frontier_mask) & island_open_mask & ~(reached_mask | touched_mask)
+                frontier_mask = step_mask & ~orphan_mask
+                if step_mask & orphan_mask:
+                    for each_orphan in self._orphan_islands:
+                        if step_mask & each_orphan.member_mask:
+                            touched_mask |= each_orphan.member_mask
+                            arrival = spent-1+len(each_orphan.members)
+                            if arrival <= budget:
+                                arrivals[arrival] = arrivals.get(arrival,0) | each_orphan.member_mask
+                frontier_mask |= arrivals.pop(spent,0)
+                reached_mask |= frontier_mask
+                if not frontier_mask and not arrivals: break
+            reach_masks[each_island] = reached_mask
+        self._island_reach_masks = reach_masks
+        self._island_reach_key = len(self._unassigned)
+        for each_group in itertools.chain(self._unassigned,self._orphan_islands):
+            each_group.reset_quick_can_reach()
+        return reach_masks
+
     def mark_cant_reach(self):
         # will default to quick can reach - must manually call calculate_can_reach_islands() on each group for more exact info taking into account available island paths
+        self.island_reach_masks()
         for each_unassigned in self._unassigned:
             if not each_unassigned.can_reach_any_island():
                 for each_cell in each_unassigned.members:
-                    self.queue_nurikabe_cell(each_cell)
+                    self.queue_nurikabe_cell(each_cell,CellQueue.PATH)
+
+    def mark_wall_articulation_points(self):
+        # the walls must all join up, so an unassigned cell whose loss would split the wall and unassigned cells
+        #   into parts that both hold walls has to be a wall.  those are articulation points of that graph, found
+        #   with Tarjan's depth first search in time linear in the cells - no nurikabe paths needed
+        if not self._nurikabe or self._articulation_key == len(self._unassigned): return False
+        self._articulation_key = len(self._unassigned)
+        wall_mask = 0
+        for each_nurikabe in self._nurikabe:
+            wall_mask |= each_nurikabe.member_mask
+        unassigned_mask = 0
+        for each_unassigned in self._unassigned:
+            unassigned_mask |= each_unassigned.member_mask
+        open_mask = wall_mask | unassigned_mask
+        # discovery order (0 for not yet seen), lowest order reachable through a back edge, and walls in the subtree
+        order = [0]*len(self._cells)
+        low = [0]*len(self._cells)
+        walls_below = [0]*len(self._cells)
+        counter = 0
+        root = next(iter(self._nurikabe[0].members))
+        counter += 1
+        order[root.index] = low[root.index] = counter
+        walls_below[root.index] = 1
+        # wall counts of the subtrees each cell cuts off from the rest
+        cut_off_walls = {}
+        stack = [(root,None,iter(root.neighbours))]
+        while stack:
+            cell,parent,neighbours = stack[-1]
+            for each_neighbour in neighbours:
+                if not each_neighbour.bit & open_mask: continue
+                if not order[each_neighbour.index]:
+                    counter += 1
+                    order[each_neighbour.index] = low[each_neighbour.index] = counter
+                    walls_below[each_neighbour.index] = 1 if each_neighbour.bit & wall_mask else 0
+                    stack.append((each_neighbour,cell,iter(each_neighbour.neighbours)))
+                    break
+                if each_neighbour is not parent and order[each_neighbour.index] < low[cell.index]:
+                    low[cell.index] = order[each_neighbour.index]
+            else:
+                stack.pop()
+                if parent is None: continue
+                if low[cell.index] < low[parent.index]:
+                    low[parent.index] = low[cell.index]
+                walls_below[parent.index] += walls_below[cell.index]
+                if low[cell.index] >= order[parent.index] and walls_below[cell.index]:
+                    cut_off_walls.setdefault(parent,[]).append(walls_below[cell.index])
+        all_walls = walls_below[root.index]
+        if all_walls < bin(wall_mask).count("1"):
+            self.set_contradiction("walls can't all be connected")
+            return False
+        for each_cell,wall_counts in cut_off_walls.items():
+            if not each_cell.bit & unassigned_mask: continue
+            for each_count in wall_counts:
+                if each_count < all_walls:
+                    self.queue_nurikabe_cell(each_cell,CellQueue.PATH)
+                    break
+        return False
 
     def mark_must_reach(self):
         for each_orphan in self._orphan_islands:
@@ -1040,15 +2382,133 @@ class Board():
     def calculate_slow_can_reach(self):
 #         print()
 #         print("calculating slow can reach")
+        # reach depends on the paths of every island, so any island changing makes every group dirty
+        island_versions = tuple(each_island.version for each_island in self._islands)
         for each_unassigned in itertools.chain(self._unassigned,self._orphan_islands):
+            if self.step_is_clean("slow can reach",each_unassigned,island_versions=island_versions): continue
             each_unassigned.calculate_can_reach()
         
+    def stream_island_shapes(self):
+        # enumerate each island's final shapes one at a time, keeping only the cells every shape takes and the
+        #   cells every shape walls off, and stop as soon as both are empty.  memory stays flat however many shapes
+        #   there are, and deductions can be found before paths that long have been built.  stream_shape_limit
+        #   bounds the work on a wide open island
+        wall_mask = 0
+        for each_nurikabe in self._nurikabe:
+            wall_mask |= each_nurikabe.member_mask
+        unassigned_mask = 0
+        for each_unassigned in self._unassigned:
+            unassigned_mask |= each_unassigned.member_mask
+        island_reach = {}
+        for each_island in itertools.chain(self._islands,self._complete_islands):
+            reach_mask = each_island.member_mask
+            for each_cell in each_island.members:
+                reach_mask |= each_cell.neighbour_mask
+            island_reach[each_island] = reach_mask
+        island_versions = (bin(unassigned_mask).count("1"),)+tuple(each_island.version for each_island in self._islands)
+        for each_island in list(self._islands):
+            if self.step_is_clean("island shapes",each_island,island_versions=island_versions): continue
+            # cells next to another island, or that another island's paths all block, can't be in this one
+            blocked_mask = 0
+            for other_island,reach_mask in island_reach.items():
+                if other_island is each_island: continue
+                blocked_mask |= reach_mask
+                if other_island in self._islands and other_island.all_paths_terminated():
+                    blocked_mask |= other_island.cells_blocked
+            usable_orphans = []
+            unusable_reach_mask = 0
+            for each_orphan in self._orphan_islands:
+                if each_orphan.member_mask & blocked_mask:
+                    unusable_reach_mask |= each_orphan.liberty_mask
+                else:
+                    usable_orphans.append(each_orphan)
+            usable_mask = unassigned_mask & ~(blocked_mask | unusable_reach_mask)
+            common_mask = -1
+            common_liberty_mask = -1
+            shape_count = 0
+            cut_off = False
+            for shape_mask,liberty_mask in each_island.iterate_shapes(usable_mask,usable_orphans,wall_mask):
+                shape_count += 1
+                common_mask &= shape_mask
+                common_liberty_mask &= liberty_mask
+                if not common_mask & ~each_island.member_mask and not common_liberty_mask & unassigned_mask or shape_count >= self._stream_shape_limit:
+                    cut_off = True
+                    break
+            self._stats.shapes_streamed += shape_count
+            if cut_off: continue
+            if not shape_count:
+                self.set_contradiction("no shapes left for island "+str(each_island))
+                return False
+            for each_cell in self.cells_from_mask(common_mask & unassigned_mask):
+                self.queue_island_cell(each_cell,CellQueue.PATH)
+            for each_cell in self.cells_from_mask(common_liberty_mask & unassigned_mask):
+                self.queue_nurikabe_cell(each_cell,CellQueue.PATH)
+        return False
+    def island_placements(self,clue_cell,size):
+        return self._polyominoes.placements(self._X,self._Y,clue_cell.x,clue_cell.y,size)
+    def liberties_finish_pool(self,liberty_mask,wall_mask):
+        walls_after = wall_mask | liberty_mask
+        pool_windows_by_bit = self.get_pool_windows_by_bit()
+        for each_cell in self.cells_from_mask(liberty_mask):
+            for each_window in pool_windows_by_bit.get(each_cell.bit,()):
+                if not each_window & ~walls_after: return True
+        return False
+    def get_pool_windows_by_bit(self):
+        return self._topology.window_masks_by_bit
+
     def build_island_paths(self):
         if self.all_island_paths_terminated(): return
-        print("  building island paths of length",self._current_island_path_length)
+        logger.debug("  building island paths of length %d",self._current_island_path_length)
         length = self._current_island_path_length
+        if self._path_workers:
+            return self.build_island_paths_in_parallel(length)
+        catching_up = False
         for each_island in self._islands:
-            each_island.extend_paths_to(length)
+            catching_up |= each_island.extend_paths_to(length)
+        return catching_up
+    def build_island_paths_in_parallel(self,length):
+        # each island only reads the board and writes its own paths, so big islands can be extended on the workers
+        #   from a snapshot of the board while the rest are extended here, and the results loaded back.  shipping an
+        #   island's paths out and back costs about half as much again as extending them here, so the island with
+        #   the most paths still to extend always stays here, and nothing goes out unless another has at least
+        #   parallel_min_paths of them - below about 1000 the fixed cost of a job is no longer small next to the work
+        open_path_counts = {}
+        for each_island in self._islands:
+            if each_island.paths is None or not each_island.liberties: continue
+            open_path_count = sum(1 for each_path in each_island.paths if not each_path.terminated)
+            if open_path_count >= self._parallel_min_paths:
+                open_path_counts[each_island] = open_path_count
+        if len(open_path_counts) < 2:
+            catching_up = False
+            for each_island in self._islands:
+                catching_up |= each_island.extend_paths_to(length)
+            return catching_up
+        del open_path_counts[max(open_path_counts,key=open_path_counts.get)]
+        big_islands = list(open_path_counts)
+        if self._path_executor is None:
+            self._path_executor = concurrent.futures.ProcessPoolExecutor(max_workers=self._path_workers)
+        state = self.snapshot()
+        clue_ids = {each_island:clue_id for clue_id,each_island in enumerate(self._clue_islands)}
+        jobs = []
+        for each_island in big_islands:
+            jobs.append((each_island,self._path_executor.submit(extend_island_paths,self.board_str_lines,
+                                                                state,clue_ids[each_island],each_island.export_paths(),length)))
+        catching_up = False
+        for each_island in self._islands:
+            if each_island in big_islands: continue
+            catching_up |= each_island.extend_paths_to(length)
+        for each_island,each_job in jobs:
+            island_catching_up,exported_paths,paths_built,contradiction = each_job.result()
+            each_island.load_paths(exported_paths)
+            self._stats.paths_built += paths_built
+            if contradiction is not None:
+                self.set_contradiction(contradiction)
+            catching_up |= island_catching_up
+        return catching_up
+    def close_path_workers(self):
+        if self._path_executor is not None:
+            self._path_executor.shutdown()
+            self._path_executor = None
 
     def all_island_paths_terminated(self):
         for each_group in self._islands:
@@ -1059,11 +2519,22 @@ class Board():
     def build_nurikabe_paths(self):
         if len(self._nurikabe)==1: return
         if self.all_nurikabe_paths_terminated(): return
-        print("  building nurikabe paths of length",self._current_nurikabe_path_length)
+        if self.nurikabe_paths_over_limit(): return
+        logger.debug("  building nurikabe paths of length %d",self._current_nurikabe_path_length)
         length = self._current_nurikabe_path_length
+        catching_up = False
+        for each_nurikabe in self._nurikabe:
+            catching_up |= each_nurikabe.extend_paths_to(length)
+        if logger.isEnabledFor(logging.DEBUG):
+            self.brief_report_paths()
+        return catching_up
+
+    def nurikabe_paths_over_limit(self):
+        path_count = 0
         for each_nurikabe in self._nurikabe:
-            each_nurikabe.extend_paths_to(length)
-        self.brief_report_paths()
+            if each_nurikabe.paths is not None:
+                path_count += len(each_nurikabe.paths)
+        return path_count > self._nurikabe_path_limit
 
     def all_nurikabe_paths_terminated(self):
         for each_group in self._nurikabe:
@@ -1081,6 +2552,7 @@ class Board():
 #             if self._current_nurikabe_path_length < len(self._unassigned):
 #                 self._current_nurikabe_path_length += 1
 #                 return True
+        if self.nurikabe_paths_over_limit(): return
         if self._current_nurikabe_path_length < 2*self._current_island_path_length:
             self._current_nurikabe_path_length += 1
             return True
@@ -1097,61 +2569,59 @@ class Board():
         self.report_nurikabe_paths()
 
     def brief_report_island_paths(self):
-        print()
         for each_island in self._islands:
             if each_island.paths is None:
-                print("no paths for island",each_island)
+                logger.debug("no paths for island %s",each_island)
             else:
-                print(len(each_island.paths),"paths for island",each_island)
+                logger.debug("%d paths for island %s",len(each_island.paths),each_island)
 
     def super_brief_report_island_paths(self):
         count = 0
         for each_island in self._islands:
             if each_island.paths is not None:
                 count += len(each_island.paths)
-        print(count,"island paths built")
+        logger.debug("%d island paths built",count)
 
     def report_island_paths(self):
-        print()
         for each_island in self._islands:
-            print("built paths for island",each_island)
+            logger.debug("built paths for island %s",each_island)
             if each_island.paths is None:
-                print("  no paths")
+                logger.debug("  no paths")
             else:
                 for each_path in each_island.paths:
-                    print("  path",each_path)
+                    logger.debug("  path %s",each_path)
 
     def report_nurikabe_paths(self):
-        print()
         for each_nurikabe in self._nurikabe:
-            print("built paths for nurikabe",each_nurikabe)
+            logger.debug("built paths for nurikabe %s",each_nurikabe)
             if each_nurikabe.paths is None:
-                print("  no paths")
+                logger.debug("  no paths")
             else:
                 for each_path in each_nurikabe.paths:
-                    print("  path",each_path)
+                    logger.debug("  path %s",each_path)
                     
     def brief_report_nurikabe_paths(self):
-        print()
         for each_nurikabe in self._nurikabe:
             if each_nurikabe.paths is None:
-                print("no paths for nurikabe",each_nurikabe)
+                logger.debug("no paths for nurikabe %s",each_nurikabe)
             else:
-                print(len(each_nurikabe.paths),"paths for nurikabe",each_nurikabe)
+                logger.debug("%d paths for nurikabe %s",len(each_nurikabe.paths),each_nurikabe)
     def super_brief_report_nurikabe_paths(self):
         count = 0
         for each_nurikabe in self._nurikabe:
             if each_nurikabe.paths is not None:
                 count += len(each_nurikabe.paths)
-        print(count,"nurikabe paths built")
+        logger.debug("%d nurikabe paths built",count)
 
 
     def island_path_overlaps(self):
         for each_island in self._islands:
+            if self.step_is_clean("island overlaps",each_island): continue
             each_island.path_overlaps()
 
     def nurikabe_path_overlaps(self):
         for each_nurikabe in self._nurikabe:
+            if self.step_is_clean("nurikabe overlaps",each_nurikabe): continue
             each_nurikabe.path_overlaps()
 
     def remove_island_paths_blocking_nurikabe_liberties(self):
@@ -1173,6 +2643,7 @@ class Board():
             cells_blocked = each_island.cells_blocked
             for each_other_island in self._islands:
                 if each_other_island is each_island: continue
+                if self.step_is_clean("island pairs",each_island,each_other_island): continue
                 did_something |= each_island.remove_paths_excluding_other_island_paths(each_other_island)
                 if not each_other_island.all_paths_terminated(): continue
                 did_something |= each_other_island.remove_paths_containing_blocked_cells(cells_blocked)
@@ -1183,77 +2654,114 @@ class Board():
         did_something = False
         for each_nurikabe in self._nurikabe:
             for each_island in self._islands:
+                if self.step_is_clean("nurikabe island pairs",each_nurikabe,each_island): continue
                 did_something |= each_nurikabe.remove_paths_excluding_island_paths(each_island)
                 did_something |= each_island.remove_paths_excluding_nurikabe_paths(each_nurikabe)
 #         self.report_paths()
         return did_something
     
+    def remove_island_paths_splitting_walls(self):
+        # an island path that would leave the walls unable to join up can't be right.  checked by flooding from one
+        #   wall through the wall and unassigned cells the path leaves open, rather than by enumerating nurikabe paths
+        if len(self._nurikabe) < 2: return False
+        wall_mask = 0
+        for each_nurikabe in self._nurikabe:
+            wall_mask |= each_nurikabe.member_mask
+        open_mask = wall_mask
+        for each_unassigned in self._unassigned:
+            open_mask |= each_unassigned.member_mask
+        seed_mask = self._nurikabe[0].member_mask
+        memo = self._step_memo.setdefault("walls split",{})
+        did_something = False
+        for each_island in self._islands:
+            if each_island.paths is None: continue
+            key = (each_island.version,len(self._unassigned),len(self._nurikabe))
+            if memo.get(each_island) == key:
+                self._stats.steps_skipped += 1
+                continue
+            for each_path in list(each_island.paths):
+                if not self.walls_can_join(seed_mask,wall_mask,open_mask & ~each_path.all_member_mask):
+                    each_island.remove_path(each_path)
+                    did_something = True
+            memo[each_island] = (each_island.version,len(self._unassigned),len(self._nurikabe))
+        return did_something
+    def walls_can_join(self,seed_mask,wall_mask,open_mask):
+        reached_mask = seed_mask
+        while wall_mask & ~reached_mask:
+            new_mask = self.spread_mask(reached_mask) & open_mask
+            if not new_mask: return False
+            reached_mask |= new_mask
+        return True
+
     def has_queued_cells(self):
         if self._island_cell_queue or self._nurikabe_cell_queue: return True
         return False
 
     def clear_cell_queue(self):
-        print()
-        print("clearing island cell queue",[each_cell.coords for each_cell in self._island_cell_queue])
-        print("clearing nurikabe cell queue",[each_cell.coords for each_cell in self._nurikabe_cell_queue])
+        tracing = logger.isEnabledFor(TRACE)
+        if tracing:
+            logger.log(TRACE,"clearing island cell queue %s",[each_cell.coords for each_cell in self._island_cell_queue])
+            logger.log(TRACE,"clearing nurikabe cell queue %s",[each_cell.coords for each_cell in self._nurikabe_cell_queue])
         while self.has_queued_cells():
-            while self._nurikabe_cell_queue:
-                print()
-                print("popping nurikabe cell",self._nurikabe_cell_queue[0].coords,"from queue",[each_cell.coords for each_cell in self._nurikabe_cell_queue])
+            if self._contradiction is not None:
+                # nothing deduced after a contradiction can be trusted
+                self._nurikabe_cell_queue.clear()
+                self._island_cell_queue.clear()
+                return
+            # the most urgent cell of either queue goes next, a nurikabe cell on a tie
+            if self._nurikabe_cell_queue.next_priority <= self._island_cell_queue.next_priority:
+                if tracing:
+                    logger.log(TRACE,"popping nurikabe cell %s from queue %s",self._nurikabe_cell_queue.first.coords,[each_cell.coords for each_cell in self._nurikabe_cell_queue])
                 changing_cell = self._nurikabe_cell_queue.popleft()
                 changing_cell.become_nurikabe()
-                if self.invalidate_paths(changing_cell):
-                    self._current_island_path_length = 1
-                    self._current_nurikabe_path_length = 1
-                print(self)
+                if self._grid is not None:
+                    self._grid.set_kind(changing_cell)
+                    for each_index in self._grid.forced_island_cells(changing_cell):
+                        self.queue_island_cell(self._cells[each_index],CellQueue.FORCED)
+                self.invalidate_paths(changing_cell)
+                logger.log(TRACE,"%s",self)
                 self.update()
-            while self._island_cell_queue:
-                print()
-                print("popping island cell",self._island_cell_queue[0].coords,"from queue",[each_cell.coords for each_cell in self._island_cell_queue])
+            else:
+                if tracing:
+                    logger.log(TRACE,"popping island cell %s from queue %s",self._island_cell_queue.first.coords,[each_cell.coords for each_cell in self._island_cell_queue])
                 changing_cell = self._island_cell_queue.popleft()
                 changing_cell.become_island()
-                if self.invalidate_paths(changing_cell):
-                    self._current_island_path_length = 1
-                    self._current_nurikabe_path_length = 1
-                print(self)
+                if self._grid is not None:
+                    self._grid.set_kind(changing_cell)
+                self.invalidate_paths(changing_cell)
+                logger.log(TRACE,"%s",self)
                 self.update()
 
     def invalidate_paths(self, changing_cell):
         did_something = False
         for each_group in itertools.chain(self._islands,self._nurikabe):
-            did_something |= each_group.invalidate_paths(changing_cell)
+            if each_group.invalidate_paths(changing_cell):
+                self._stats.invalidations += 1
+                did_something = True
         return did_something
 
-    def update_group_liberties(self):
-        for each_group in itertools.chain(self._islands,self._nurikabe,self._orphan_islands):
-            if each_group.changed:
-                each_group.update_liberties()
-        
     def update(self):
-        print()
-        print("updating board")
+        logger.debug("updating board")
         changed=True
         while changed:
             changed=False
-            self.update_group_liberties()
             for each_group in itertools.chain(self._islands,self._nurikabe,self._orphan_islands):
                 if each_group.changed:
                     changed=True
                     each_group.update()
 
 
-def main():
-    board_str1 = '''\
+board_str1 = '''\
 3--
 ---
 3--\
 '''
-    board_str2 = '''\
+board_str2 = '''\
 2--
 ---
 3--\
 '''
-    board_str3 = '''\
+board_str3 = '''\
 6-7---1
 -------
 -------
@@ -1262,7 +2770,7 @@ def main():
 --3--1-
 1------\
 '''
-    board_str4 = '''\
+board_str4 = '''\
 2-3-3--
 -------
 ------3
@@ -1271,7 +2779,7 @@ def main():
 ----2--
 -------\
 '''
-    board_str5 = '''\
+board_str5 = '''\
 2--1-3---1-4-2--1-2-
 --------------------
 2-2-1-1-3-----3-1---
@@ -1293,7 +2801,7 @@ def main():
 --1-----------1----1
 1---1-2--2--1-------\
 '''
-    board_str6 = '''\
+board_str6 = '''\
 2--2--3--3-1-2-3-1-3
 --------------------
 2--3-4-----1--------
@@ -1316,7 +2824,7 @@ c-3------------5--2-
 3-------4-----------\
 '''
 # board_str7 has no solution?  changed 2--6 to 3--6
-    board_str7 = '''\
+board_str7 = '''\
 1-3-3---2-3--4--2-1-
 --------------------
 1---3-3--1---------3
@@ -1338,7 +2846,7 @@ c-3------------5--2-
 --1-----3-----1-----
 1---------------2---\
 '''
-    board_str8 = '''\
+board_str8 = '''\
 ----2--1-2-----1-4--
 4------------3------
 ---1-1--------2-1-1-
@@ -1361,7 +2869,7 @@ c-3------------5--2-
 --------1---------1-\
 '''
 # board 9 will require some multiple-path checks.
-    board_str9 = '''\
+board_str9 = '''\
 1-2-3---1-2--3--4-2-
 --------------------
 2--3---3---2-------2
@@ -1383,7 +2891,7 @@ c-3------------5--2-
 -----------1-1-1-2--
 2----2--------------\
 '''
-    board_str10 = '''\
+board_str10 = '''\
 2-2-2--2-2-4
 ------------
 ---3--4-----
@@ -1397,7 +2905,7 @@ c-3------------5--2-
 -----2--1-1-
 ------------\
 '''
-    board_str11 = '''\
+board_str11 = '''\
 1-1-1-3---1-
 ------------
 3-1-1------3
@@ -1411,7 +2919,7 @@ c-3------------5--2-
 ----3-------
 ---1---1-1-1\
 '''
-    board_str12 = '''\
+board_str12 = '''\
 4-2-4---3--3
 ------------
 ---3--------
@@ -1425,7 +2933,7 @@ c-3------------5--2-
 ------------
 4----2--2---\
 '''
-    board_str13 = '''\
+board_str13 = '''\
 2--2--1-2--2
 ------------
 2--2-2-3----
@@ -1439,7 +2947,7 @@ c-3------------5--2-
 ----------3-
 --------1---\
 '''
-    board_str14 = '''\
+board_str14 = '''\
 a-1-2-3--2-1
 ------------
 ---3--------
@@ -1453,7 +2961,7 @@ a-1-2-3--2-1
 -1---1------
 ---------1-1\
 '''
-    board_str15 = '''\
+board_str15 = '''\
 1-4--1-1-2--
 ------------
 4---2--3-3--
@@ -1467,7 +2975,7 @@ a-1-2-3--2-1
 -----2---1--
 2-----------\
 '''
-    board_str16 = '''\
+board_str16 = '''\
 6-1-2--3--3-
 ------------
 -------2----
@@ -1481,7 +2989,7 @@ a-1-2-3--2-1
 4------2-2--
 ------------\
 '''
-    board_str17 = '''\
+board_str17 = '''\
 4-3--1-1-2--1--
 -------------2-
 ----3-3---6----
@@ -1498,7 +3006,7 @@ a-1-2-3--2-1
 1-----3--1-----
 --3--------2---\
 '''
-    board_str18 = '''\
+board_str18 = '''\
 1----2---------
 --2-----------4
 -1--2---3-1----
@@ -1515,7 +3023,7 @@ a-1-2-3--2-1
 ---5-----------
 ----1-6-2--4-3-\
 '''
-    board_str19 = '''\
+board_str19 = '''\
 --4--1---3----2
 ----1-----1-b--
 ---3-----4----2
@@ -1532,7 +3040,7 @@ a-1-2-3--2-1
 -3---------4---
 ------3-------3\
 '''
-    board_str20 = '''\
+board_str20 = '''\
 1--------1----2
 ---2-----------
 -1---4------3--
@@ -1549,7 +3057,7 @@ a-1-2-3--2-1
 ---------------
 2--3--2-1-1-3-3\
 '''
-    board_str21 = '''\
+board_str21 = '''\
 -2------2--2---
 --------------3
 -1---4-1-------
@@ -1567,12 +3075,436 @@ a-1-2-3--2-1
 --4-3-2--3--2-3\
 '''
 
-    this_board = Board(board_str_lines=board_str21.split('\n'))
-    print(this_board)
-    this_board.solve()
-#     print(this_board._islands)
-#     print(this_board._nurikabe[0],this_board._nurikabe[1])
-#     print(this_board._orphan_islands)
+SAMPLE_BOARDS = [board_str1,board_str2,board_str3,board_str4,board_str5,board_str6,board_str7,board_str8,board_str9,board_str10,board_str11,board_str12,board_str13,board_str14,board_str15,board_str16,board_str17,board_str18,board_str19,board_str20,board_str21]
+
+
+def read_puzzles(stream):
+    # puzzles are in the board_str format, one after another, separated by blank lines; lines starting with # are ignored
+    board_str_lines = []
+    for line in stream:
+        line = line.strip()
+        if line.startswith('#'): continue
+        if line:
+            board_str_lines.append(line)
+        elif board_str_lines:
+            yield board_str_lines
+            board_str_lines = []
+    if board_str_lines:
+        yield board_str_lines
+
+def transform_lines(lines,transform):
+    # one of the 8 symmetries of the grid: transform % 4 quarter turns clockwise, after mirroring left to right
+    #   if transform >= 4
+    if transform >= 4:
+        lines = [each_line[::-1] for each_line in lines]
+    for each_turn in range(transform % 4):
+        lines = [''.join(each_line[x] for each_line in reversed(lines)) for x in range(len(lines[0]))]
+    return list(lines)
+
+def untransform_lines(lines,transform):
+    # undo transform_lines: turn back the other way, then mirror again
+    for each_turn in range((4 - transform % 4) % 4):
+        lines = [''.join(each_line[x] for each_line in reversed(lines)) for x in range(len(lines[0]))]
+    if transform >= 4:
+        lines = [each_line[::-1] for each_line in lines]
+    return list(lines)
+
+def clue_lines(X,Y,clue_counts):
+    # puzzle text for X*Y row-major clue counts
+    return [''.join(Island.count_to_character(each_count) if each_count else '-' for each_count in clue_counts[y*X:(y+1)*X])
+            for y in range(Y)]
+
+def puzzle_clues(puzzle):
+    # (X, Y, clue counts as bytes) of a puzzle given as board_str lines or as a CorpusPuzzle.  anything in the text
+    #   that isn't a clue counts as 0, as it does for Board.__init__
+    if isinstance(puzzle,CorpusPuzzle):
+        return puzzle.X,puzzle.Y,bytes(puzzle.clues)
+    if not puzzle or any(len(each_line) != len(puzzle[0]) for each_line in puzzle):
+        raise ValueError("every line of a puzzle must be the same length")
+    return len(puzzle[0]),len(puzzle),bytes(Island.character_to_count(character) or 0 for line in puzzle for character in line)
+
+# (X, Y, transform) -> clue_transform of it
+clue_transforms = {}
+
+def clue_transform(X,Y,transform):
+    # transform_lines for clue counts: the size of the transformed board, and for each of its cells in row order the
+    #   index of the cell it comes from
+    key = (X,Y,transform)
+    if key not in clue_transforms:
+        rows = [list(range(y*X,(y+1)*X)) for y in range(Y)]
+        if transform >= 4:
+            rows = [each_row[::-1] for each_row in rows]
+        for each_turn in range(transform % 4):
+            rows = [[each_row[x] for each_row in reversed(rows)] for x in range(len(rows[0]))]
+        clue_transforms[key] = (len(rows[0]),len(rows),[index for each_row in rows for index in each_row])
+    return clue_transforms[key]
+
+def transform_clues(X,Y,clues,transform):
+    transformed_X,transformed_Y,sources = clue_transform(X,Y,transform)
+    return transformed_X,transformed_Y,bytes(map(clues.__getitem__,sources))
+
+def canonical_form(puzzle):
+    # the puzzle's (X, Y, clue counts) in whichever of its 8 orientations sorts first, and the transform that gets
+    #   it there.  copies of a puzzle that are rotated or mirrored all have the same canonical form, and it comes
+    #   straight from the clue bytes of a CorpusPuzzle without going through text
+    X,Y,clues = puzzle_clues(puzzle)
+    return min((transform_clues(X,Y,clues,transform),transform) for transform in range(8))
+
+def reoriented_result(result,from_transform,to_transform):
+    # a copy of a solve_puzzle result for the puzzle whose canonical form transform is from_transform, turned round
+    #   for a copy of the puzzle whose transform is to_transform
+    result = dict(result)
+    if "solution" in result:
+        result["solution"] = untransform_lines(transform_lines(result["solution"],from_transform),to_transform)
+    return result
+
+# each path worker process keeps a board per puzzle, so a job only has to restore a snapshot onto it
+worker_boards = {}
+
+def extend_island_paths(board_str_lines,state,clue_id,exported_paths,length):
+    # worker for Board.build_island_paths_in_parallel - extends one island's paths on this process's copy of the board
+    key = tuple(board_str_lines)
+    if key not in worker_boards:
+        worker_boards[key] = Board(board_str_lines)
+    board = worker_boards[key]
+    board.restore(state)
+    island = board._clue_islands[clue_id]
+    island.load_paths(exported_paths)
+    paths_built = board.stats.paths_built
+    catching_up = island.extend_paths_to(length)
+    return catching_up,island.export_paths(),board.stats.paths_built-paths_built,board.contradiction
+
+def solve_puzzle(puzzle,search=True,node_budget=1000,stream_shapes=False,use_numpy=False,path_workers=0,parallel_min_paths=1000,
+                 polyomino_size=6,canonical=True):
+    # worker for batch solving - only plain data goes in and out, so it can run in another process.  the board is
+    #   built from the puzzle's canonical form, so rotated and mirrored copies are all solved the same way, and the
+    #   solution is turned back to the orientation the puzzle came in.  puzzle is board_str lines or a CorpusPuzzle
+    #   (detached, to cross to another process)
+    start_time = time.perf_counter()
+    if canonical:
+        (X,Y,clues),transform = canonical_form(puzzle)
+    else:
+        (X,Y,clues),transform = puzzle_clues(puzzle),0
+    board = Board.from_clues(X,Y,clues,stream_shapes=stream_shapes,use_numpy=use_numpy,path_workers=path_workers,
+                             parallel_min_paths=parallel_min_paths,polyomino_size=polyomino_size)
+    stats = board.solve(search=search,node_budget=node_budget)
+    if board.is_solved():
+        status = "solved"
+    elif board.contradiction is not None:
+        status = "no solution"
+    else:
+        status = "unsolved"
+    return {"status":status,
+            "elapsed_ms":round((time.perf_counter()-start_time)*1000,3),
+            "unassigned":len(board._unassigned),
+            "solution":untransform_lines(board.grid_lines(),transform),
+            "stats":stats.as_dict()}
+
+def solve_batch(puzzles,jobs=1,max_in_flight=None,ordered=True,cache=None,dedupe_limit=10000,**solve_options):
+    # solve (source, puzzle) pairs - puzzle being board_str lines or a CorpusPuzzle, or an exception for a source
+    #   that couldn't be read (see iterate_puzzle_sources) - on a process pool (in this process if jobs is 1), with at most
+    #   max_in_flight puzzles submitted at once.  results come back in input order, or as they complete if ordered
+    #   is False.  a puzzle with the same canonical form as one of the last dedupe_limit distinct puzzles isn't
+    #   solved again - it gets that one's result turned round, with duplicate_of set to its index (unless
+    #   canonical is turned off in solve_options, when every puzzle is solved as given).  with a SolutionCache,
+    #   puzzles it already has never reach the pool, and everything it doesn't is stored once solved - only this
+    #   process touches the cache.  a puzzle that can't be read gets an error result rather than stopping the batch
+    if jobs < 1:
+        raise ValueError("jobs must be at least 1, got "+str(jobs))
+    if max_in_flight is None:
+        max_in_flight = 2*jobs if jobs > 1 else 1
+    if max_in_flight < 1:
+        raise ValueError("max_in_flight must be at least 1, got "+str(max_in_flight))
+    if not solve_options.get("canonical",True):
+        dedupe_limit = 0
+    executor = concurrent.futures.ProcessPoolExecutor(max_workers=jobs) if jobs > 1 else None
+    uncached = {}
+    # canonical clues -> (index, transform, future) of the first copy of each recent puzzle
+    first_copies = OrderedDict()
+    try:
+        in_flight = deque()
+        for index,(source,puzzle) in enumerate(puzzles):
+            try:
+                future = batch_future(index,puzzle,executor,cache,uncached,first_copies,dedupe_limit,solve_options)
+            except Exception as error:
+                future = concurrent.futures.Future()
+                future.set_exception(error)
+            in_flight.append((index,source,future))
+            while len(in_flight) >= max_in_flight:
+                yield from store_batch_results(collect_batch_results(in_flight,ordered),cache,uncached)
+        while in_flight:
+            yield from store_batch_results(collect_batch_results(in_flight,ordered),cache,uncached)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+def batch_future(index,puzzle,executor,cache,uncached,first_copies,dedupe_limit,solve_options):
+    # the future for one puzzle of solve_batch: a duplicate's, the cache's, or a new solve's
+    if isinstance(puzzle,Exception):
+        raise puzzle
+    if dedupe_limit:
+        canonical_clues,transform = canonical_form(puzzle)
+        if canonical_clues in first_copies:
+            first_copies.move_to_end(canonical_clues)
+            return duplicate_future(*first_copies[canonical_clues],transform)
+    result = cache.get(puzzle) if cache is not None else None
+    if result is not None:
+        future = concurrent.futures.Future()
+        future.set_result(result)
+    elif executor is not None:
+        if isinstance(puzzle,CorpusPuzzle):
+            puzzle = puzzle.detached()
+        future = executor.submit(solve_puzzle,puzzle,**solve_options)
+        uncached[index] = puzzle
+    else:
+        future = concurrent.futures.Future()
+        try:
+            future.set_result(solve_puzzle(puzzle,**solve_options))
+        except Exception as error:
+            future.set_exception(error)
+        uncached[index] = puzzle
+    if dedupe_limit:
+        first_copies[canonical_clues] = (index,transform,future)
+        if len(first_copies) > dedupe_limit:
+            first_copies.popitem(last=False)
+    return future
+
+def duplicate_future(first_index,first_transform,first_future,transform):
+    # a future for the result of another copy of the puzzle behind first_future
+    future = concurrent.futures.Future()
+    def reorient(done_future):
+        if done_future.exception() is not None:
+            future.set_exception(done_future.exception())
+            return
+        result = reoriented_result(done_future.result(),first_transform,transform)
+        for each_key in ("index","source","cached"):
+            result.pop(each_key,None)
+        result["duplicate_of"] = first_index
+        future.set_result(result)
+    first_future.add_done_callback(reorient)
+    return future
+
+def store_batch_results(results,cache,uncached):
+    for each_result in results:
+        puzzle = uncached.pop(each_result["index"],None)
+        if cache is not None and puzzle is not None:
+            cache.put(puzzle,each_result)
+        yield each_result
+
+def collect_batch_results(in_flight,ordered):
+    if ordered:
+        index,source,future = in_flight.popleft()
+        yield batch_result(index,source,future.result)
+        return
+    concurrent.futures.wait([future for index,source,future in in_flight],return_when=concurrent.futures.FIRST_COMPLETED)
+    for each_entry in list(in_flight):
+        index,source,future = each_entry
+        if future.done():
+            in_flight.remove(each_entry)
+            yield batch_result(index,source,future.result)
+
+def batch_result(index,source,get_result):
+    try:
+        result = get_result()
+    except Exception as error:
+        result = {"status":"error","error":repr(error)}
+    result["index"] = index
+    result["source"] = source
+    return result
+
+def iterate_puzzle_sources(puzzle_files,samples):
+    for each_sample in samples:
+        yield "sample:"+str(each_sample),SAMPLE_BOARDS[each_sample-1].split('\n')
+    for each_file in puzzle_files:
+        if each_file == '-':
+            for board_str_lines in read_puzzles(sys.stdin):
+                yield "<stdin>",board_str_lines
+            continue
+        # a file that can't be read, or is damaged part way through, gives the error in place of a puzzle and the
+        #   rest of the sources still get read - solve_batch turns it into an error result
+        try:
+            if each_file.endswith(".nkb"):
+                with PuzzleCorpus(each_file) as corpus:
+                    for each_puzzle in corpus:
+                        yield each_file,each_puzzle
+            else:
+                with open(each_file) as puzzle_stream:
+                    for board_str_lines in read_puzzles(puzzle_stream):
+                        yield each_file,board_str_lines
+        except (OSError,ValueError) as error:
+            yield each_file,error
+
+def remember_puzzles(puzzles,remembered):
+    for index,(source,puzzle) in enumerate(puzzles):
+        remembered[index] = puzzle
+        yield source,puzzle
+
+def benchmark_puzzle(puzzle,repeat=5,warmup=1,search=True,node_budget=1000,stream_shapes=False,use_numpy=False,path_workers=0,
+                     parallel_min_paths=1000,polyomino_size=6):
+    # time repeat solves after warmup untimed ones, then one more solve under tracemalloc for the peak memory.  puzzle
+    #   is board_str lines or a CorpusPuzzle
+    X,Y,clues = puzzle_clues(puzzle)
+    board_options = {"stream_shapes":stream_shapes,"use_numpy":use_numpy,"path_workers":path_workers,
+                     "parallel_min_paths":parallel_min_paths,"polyomino_size":polyomino_size}
+    if repeat < 1:
+        raise ValueError("repeat must be at least 1, got "+str(repeat))
+    for each_run in range(0,warmup):
+        Board.from_clues(X,Y,clues,**board_options).solve(search=search,node_budget=node_budget)
+    times = []
+    for each_run in range(0,repeat):
+        start_time = time.perf_counter()
+        Board.from_clues(X,Y,clues,**board_options).solve(search=search,node_budget=node_budget)
+        times.append(time.perf_counter()-start_time)
+    # the untimed solve under tracemalloc also gives the outcome reported
+    tracemalloc.start()
+    try:
+        stats = Board.from_clues(X,Y,clues,**board_options).solve(search=search,node_budget=node_budget)
+        peak_memory = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    times.sort()
+    return {"solved":stats.solved,
+            "unassigned":stats.unassigned,
+            "median_ms":round(statistics.median(times)*1000,3),
+            "p95_ms":round(times[math.ceil(0.95*len(times))-1]*1000,3),
+            "peak_kib":round(peak_memory/1024,1)}
+
+def run_benchmarks(puzzles,**benchmark_options):
+    # puzzles are (source, puzzle) pairs as solve_batch takes them; results are keyed by source, numbered when a source has several puzzles
+    results = {}
+    source_counts = {}
+    # sources or puzzles that can't be read are logged and left out
+    for source,puzzle in puzzles:
+        if isinstance(puzzle,Exception):
+            logger.error("%s: %s",source,puzzle)
+            continue
+        source_counts[source] = source_counts.get(source,0) + 1
+        name = source if source.startswith("sample:") else source+"#"+str(source_counts[source])
+        try:
+            results[name] = benchmark_puzzle(puzzle,**benchmark_options)
+        except ValueError as error:
+            logger.error("%s: %s",name,error)
+            continue
+        logger.info("%s %s",name,results[name])
+    return results
+
+def compare_to_baseline(results,baseline,tolerance=0.25,slack_ms=1.0):
+    # returns a list of regressions: puzzles that stopped being solved, or got slower or bigger than the baseline by more than tolerance.
+    #   times also get slack_ms on top, so scheduler noise on sub-millisecond puzzles isn't taken for a regression
+    regressions = []
+    for name,result in results.items():
+        if name not in baseline: continue
+        baseline_result = baseline[name]
+        if baseline_result["solved"] and not result["solved"]:
+            regressions.append("{}: no longer solved".format(name))
+        elif result["unassigned"] is not None and baseline_result["unassigned"] is not None and result["unassigned"] > baseline_result["unassigned"]:
+            regressions.append("{}: {} unassigned cells, baseline {}".format(name,result["unassigned"],baseline_result["unassigned"]))
+        for measure in ("median_ms","p95_ms","peak_kib"):
+            allowed = baseline_result[measure]*(1+tolerance)
+            if measure.endswith("_ms"):
+                allowed = max(allowed,baseline_result[measure]+slack_ms)
+            if result[measure] > allowed:
+                regressions.append("{}: {} {} vs baseline {}".format(name,measure,result[measure],baseline_result[measure]))
+    return regressions
+
+def benchmark_main(args,puzzle_files,samples):
+    if not puzzle_files and not samples:
+        samples = range(1,len(SAMPLE_BOARDS)+1)
+    results = run_benchmarks(iterate_puzzle_sources(puzzle_files,samples),repeat=args.repeat,warmup=args.warmup,
+                             search=not args.no_search,node_budget=args.node_budget,stream_shapes=args.stream_shapes,use_numpy=args.numpy,path_workers=args.path_workers,
+                             parallel_min_paths=args.parallel_min_paths,polyomino_size=args.polyomino_size)
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as baseline_file:
+            baseline = json.load(baseline_file)
+    sys.stdout.write("{:<24} {:>8} {:>11} {:>11} {:>11} {:>11}\n".format("puzzle","solved","median ms","p95 ms","peak KiB","baseline ms"))
+    for name,result in results.items():
+        baseline_time = "{:.3f}".format(baseline[name]["median_ms"]) if name in baseline else ''
+        sys.stdout.write("{:<24} {:>8} {:>11.3f} {:>11.3f} {:>11.1f} {:>11}\n".format(
+            name,"yes" if result["solved"] else "no",result["median_ms"],result["p95_ms"],result["peak_kib"],baseline_time))
+    if args.save_baseline:
+        with open(args.save_baseline,'w') as baseline_file:
+            json.dump(results,baseline_file,indent=1,sort_keys=True)
+    regressions = compare_to_baseline(results,baseline,args.tolerance,args.slack_ms)
+    for each_regression in regressions:
+        logger.error("REGRESSION %s",each_regression)
+    return 1 if regressions else 0
+
+def positive_int(text):
+    # argparse type for counts that must be at least 1
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError("must be at least 1, got "+text)
+    return value
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Solve nurikabe puzzles, writing one JSON line per puzzle.")
+    parser.add_argument("puzzle_files",nargs='*',help="files of blank-line separated puzzles or .nkb corpus files, - for stdin (the default when no samples are given)")
+    parser.add_argument("--sample",type=int,action='append',default=[],choices=range(1,len(SAMPLE_BOARDS)+1),metavar='N',help="also solve the built-in board_strN")
+    parser.add_argument("-j","--jobs",type=positive_int,default=1,help="number of worker processes")
+    parser.add_argument("--max-in-flight",type=positive_int,default=None,help="puzzles submitted to the pool at once (default 2 x jobs)")
+    parser.add_argument("--unordered",action='store_true',help="write results as they complete instead of in input order")
+    parser.add_argument("--no-search",action='store_true',help="don't fall back to hypothesis search when deduction stalls")
+    parser.add_argument("--node-budget",type=int,default=1000,help="maximum hypothesis search nodes per puzzle")
+    parser.add_argument("--stream-shapes",action='store_true',help="also stream each island's final shapes before building its paths")
+    parser.add_argument("--path-workers",type=int,default=0,help="extend the paths of big islands on this many extra processes per puzzle")
+    parser.add_argument("--parallel-min-paths",type=int,default=1000,help="paths an island needs before --path-workers extends it on another process")
+    parser.add_argument("--polyomino-size",type=int,default=6,help="islands up to this size take their shapes from the precomputed polyomino table")
+    parser.add_argument("--numpy",action='store_true',help="do pool checks on a numpy grid (for big boards)")
+    parser.add_argument("--no-canonical",action='store_true',help="solve puzzles in the orientation given rather than their canonical rotation or reflection")
+    parser.add_argument("--cache",action='store_true',help="look puzzles up in the solution cache first, and store new solutions in it")
+    parser.add_argument("--cache-path",default=None,help="solution cache file (default "+SolutionCache.default_cache_path()+"), implies --cache")
+    parser.add_argument("--cache-size",type=int,default=100000,help="most solutions kept in the cache before the least recently used go")
+    parser.add_argument("--write-corpus",default=None,metavar='PATH',help="also write every puzzle, with its solution if solved, to this .nkb corpus file")
+    parser.add_argument("--clear-cache",action='store_true',help="empty the solution cache before solving")
+    parser.add_argument("--benchmark",action='store_true',help="time the puzzles (all samples by default) instead of writing solutions")
+    parser.add_argument("--repeat",type=positive_int,default=5,help="timed solves per puzzle when benchmarking")
+    parser.add_argument("--warmup",type=int,default=1,help="untimed solves per puzzle before timing")
+    parser.add_argument("--baseline",help="benchmark JSON to compare against - exits with status 1 on any regression")
+    parser.add_argument("--save-baseline",help="write the benchmark results to this JSON file")
+    parser.add_argument("--tolerance",type=float,default=0.25,help="allowed fractional slowdown or memory growth against the baseline")
+    parser.add_argument("--slack-ms",type=float,default=1.0,help="slowdown in milliseconds always allowed against the baseline, so tiny puzzles aren't judged on --tolerance alone")
+    parser.add_argument("-v","--verbose",action='count',default=0,help="log solver progress to stderr (-v info, -vv debug, -vvv trace)")
+    args = parser.parse_args(argv)
+    if args.numpy and numpy is None:
+        parser.error("--numpy needs numpy installed")
+    logging.basicConfig(level=[logging.WARNING,logging.INFO,logging.DEBUG,TRACE][min(args.verbose,3)],format="%(message)s")
+    puzzle_files = args.puzzle_files
+    if args.benchmark:
+        return benchmark_main(args,puzzle_files,args.sample)
+    if not puzzle_files and not args.sample:
+        puzzle_files = ['-']
+    cache = None
+    if args.cache or args.cache_path is not None or args.clear_cache:
+        cache = SolutionCache(args.cache_path,max_entries=args.cache_size)
+        if args.clear_cache:
+            cache.clear()
+    puzzles = iterate_puzzle_sources(puzzle_files,args.sample)
+    corpus_writer = None
+    # puzzles by index, until their results are written to the corpus
+    unwritten = {}
+    if args.write_corpus is not None:
+        corpus_writer = CorpusWriter(args.write_corpus)
+        puzzles = remember_puzzles(puzzles,unwritten)
+    results = solve_batch(puzzles,jobs=args.jobs,max_in_flight=args.max_in_flight,
+                          ordered=not args.unordered,cache=cache,search=not args.no_search,node_budget=args.node_budget,
+                          stream_shapes=args.stream_shapes,use_numpy=args.numpy,path_workers=args.path_workers,
+                          parallel_min_paths=args.parallel_min_paths,polyomino_size=args.polyomino_size,canonical=not args.no_canonical)
+    try:
+        for each_result in results:
+            sys.stdout.write(json.dumps(each_result)+'\n')
+            sys.stdout.flush()
+            puzzle = unwritten.pop(each_result["index"],None)
+            if corpus_writer is not None and each_result["status"] != "error":
+                corpus_writer.write(puzzle,each_result["solution"] if each_result["status"] == "solved" else None)
+    finally:
+        if corpus_writer is not None:
+            corpus_writer.close()
+        if cache is not None:
+            logger.info("solution cache: %d hits, %d misses, %d entries",cache.hits,cache.misses,len(cache))
+            cache.close()
+
+    return 0
 
     
-if __name__ == "__main__": main()
\ No newline at end of file
+if __name__ == "__main__": sys.exit(main())
\ No newline at end of file
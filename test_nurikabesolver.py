@@ -0,0 +1,162 @@
+import pytest
+
+import nurikabesolver
+from nurikabesolver import (CorpusPuzzle, CorpusWriter, PuzzleCorpus, SolutionCache, canonical_form, clue_lines,
+                            iterate_puzzle_sources, puzzle_clues, solve_batch, solve_puzzle, transform_clues, transform_lines,
+                            untransform_lines)
+
+
+# no rotation or reflection of it is the same puzzle, so each has just the one canonical transform
+PUZZLE = ["3--","---","-2-"]
+
+
+def test_cache_returns_solution_in_the_asked_orientation(tmp_path):
+    cache = SolutionCache(str(tmp_path/"cache.sqlite"))
+    result = solve_puzzle(PUZZLE)
+    cache.put(PUZZLE,result)
+    for each_transform in range(8):
+        turned = transform_lines(PUZZLE,each_transform)
+        cached = cache.get(turned)
+        assert cached["cached"]
+        assert cached["status"] == result["status"]
+        assert cached["solution"] == transform_lines(result["solution"],each_transform)
+    assert len(cache) == 1
+    cache.close()
+
+def test_cache_skips_unsolved_results(tmp_path):
+    cache = SolutionCache(str(tmp_path/"cache.sqlite"))
+    cache.put(PUZZLE,{"status":"unsolved","unassigned":3,"solution":PUZZLE,"stats":{}})
+    assert cache.get(PUZZLE) is None
+    assert len(cache) == 0
+    cache.close()
+
+def test_cache_cleared_by_another_solver_version(tmp_path,monkeypatch):
+    path = str(tmp_path/"cache.sqlite")
+    cache = SolutionCache(path)
+    cache.put(PUZZLE,solve_puzzle(PUZZLE))
+    cache.close()
+    cache = SolutionCache(path)
+    assert cache.get(PUZZLE) is not None
+    cache.close()
+    monkeypatch.setattr(nurikabesolver,"SOLVER_VERSION",nurikabesolver.SOLVER_VERSION+1)
+    cache = SolutionCache(path)
+    assert len(cache) == 0
+    assert cache.get(PUZZLE) is None
+    cache.close()
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = SolutionCache(str(tmp_path/"cache.sqlite"),max_entries=2)
+    puzzles = [["2-","--"],PUZZLE,["2---","----","--3-"]]
+    cache.put(puzzles[0],solve_puzzle(puzzles[0]))
+    cache.put(puzzles[1],solve_puzzle(puzzles[1]))
+    # using the first makes the second the oldest
+    assert cache.get(puzzles[0]) is not None
+    cache.put(puzzles[2],solve_puzzle(puzzles[2]))
+    assert len(cache) == 2
+    assert cache.get(puzzles[0]) is not None
+    assert cache.get(puzzles[1]) is None
+    assert cache.get(puzzles[2]) is not None
+    cache.close()
+
+
+def test_untransform_lines_undoes_transform_lines():
+    lines = ["ab-","--c"]
+    for each_transform in range(8):
+        assert untransform_lines(transform_lines(lines,each_transform),each_transform) == lines
+    assert transform_lines(lines,1) == ["-a","-b","c-"]
+    assert transform_lines(lines,4) == ["-ba","c--"]
+
+def test_canonical_form_is_the_same_for_every_orientation():
+    canonical_clues,transform = canonical_form(PUZZLE)
+    for each_transform in range(8):
+        assert canonical_form(transform_lines(PUZZLE,each_transform))[0] == canonical_clues
+    # anything that isn't a clue doesn't matter
+    assert canonical_form(["3..","-.-","-2-"])[0] == canonical_clues
+
+def test_canonical_form_rejects_ragged_puzzles():
+    with pytest.raises(ValueError):
+        canonical_form(["3--","--","-2-"])
+
+def test_batch_solves_copies_once_and_turns_the_solution_round():
+    puzzles = [("copy "+str(each_transform),transform_lines(PUZZLE,each_transform)) for each_transform in range(8)]
+    results = list(solve_batch(puzzles))
+    first_solution = results[0]["solution"]
+    assert "duplicate_of" not in results[0]
+    for each_transform,each_result in enumerate(results[1:],1):
+        assert each_result["duplicate_of"] == 0
+        assert each_result["source"] == "copy "+str(each_transform)
+        assert each_result["solution"] == transform_lines(first_solution,each_transform)
+
+def test_batch_without_canonical_solves_every_copy():
+    puzzles = [("copy",PUZZLE),("turned",transform_lines(PUZZLE,3))]
+    results = list(solve_batch(puzzles,canonical=False))
+    assert not any("duplicate_of" in each_result for each_result in results)
+    assert [each_result["status"] for each_result in results] == ["solved","solved"]
+
+def test_batch_gives_an_error_result_for_a_ragged_puzzle():
+    puzzles = [("ragged",["3--","--"]),("fine",PUZZLE)]
+    for canonical in (True,False):
+        results = list(solve_batch(puzzles,canonical=canonical))
+        assert results[0]["status"] == "error"
+        assert results[1]["status"] == "solved"
+
+def test_batch_rejects_max_in_flight_below_one():
+    with pytest.raises(ValueError):
+        list(solve_batch([("fine",PUZZLE)],max_in_flight=0))
+
+
+def test_transform_clues_matches_transform_lines():
+    lines = ["3--a","----","-2-1"]
+    X,Y,clues = puzzle_clues(lines)
+    assert (X,Y) == (4,3)
+    for each_transform in range(8):
+        transformed_X,transformed_Y,transformed_clues = transform_clues(X,Y,clues,each_transform)
+        assert clue_lines(transformed_X,transformed_Y,transformed_clues) == transform_lines(lines,each_transform)
+
+def write_corpus(path,puzzles):
+    with CorpusWriter(str(path)) as writer:
+        for each_puzzle,each_solution in puzzles:
+            writer.write(each_puzzle,each_solution)
+
+def test_corpus_round_trip(tmp_path):
+    solution = solve_puzzle(PUZZLE)["solution"]
+    other = ["2---","----","--3-"]
+    write_corpus(tmp_path/"puzzles.nkb",[(PUZZLE,solution),(other,None)])
+    with PuzzleCorpus(str(tmp_path/"puzzles.nkb")) as corpus:
+        assert len(corpus) == 2
+        first,second = [(each_puzzle.board_str_lines(),each_puzzle.solution_lines()) for each_puzzle in corpus]
+        assert first == (PUZZLE,solution)
+        assert second == (other,None)
+        assert corpus[1].board_str_lines() == other
+        # a corpus puzzle packs to the same record as its text
+        assert CorpusWriter.pack(corpus[0],solution) == CorpusWriter.pack(PUZZLE,solution)
+
+def test_corpus_puzzles_solve_like_their_text(tmp_path):
+    puzzles = [PUZZLE,["2---","----","--3-"],transform_lines(PUZZLE,5)]
+    write_corpus(tmp_path/"puzzles.nkb",[(each_puzzle,None) for each_puzzle in puzzles])
+    with PuzzleCorpus(str(tmp_path/"puzzles.nkb")) as corpus:
+        from_corpus = list(solve_batch(("corpus",each_puzzle) for each_puzzle in corpus))
+    from_text = list(solve_batch(("text",each_puzzle) for each_puzzle in puzzles))
+    assert [each_result["solution"] for each_result in from_corpus] == [each_result["solution"] for each_result in from_text]
+    assert from_corpus[2]["duplicate_of"] == 0
+
+def test_truncated_corpus_gives_an_error_and_the_batch_goes_on(tmp_path):
+    write_corpus(tmp_path/"puzzles.nkb",[(PUZZLE,None),(["2---","----","--3-"],None)])
+    data = (tmp_path/"puzzles.nkb").read_bytes()
+    (tmp_path/"truncated.nkb").write_bytes(data[:-3])
+    (tmp_path/"damaged.nkb").write_bytes(b"not a corpus")
+    with PuzzleCorpus(str(tmp_path/"truncated.nkb")) as corpus:
+        with pytest.raises(ValueError):
+            list(corpus)
+    sources = [str(tmp_path/"truncated.nkb"),str(tmp_path/"damaged.nkb"),str(tmp_path/"puzzles.nkb")]
+    results = list(solve_batch(iterate_puzzle_sources(sources,[]),dedupe_limit=0))
+    assert [(each_result["source"],each_result["status"]) for each_result in results] == [
+        (sources[0],"solved"),(sources[0],"error"),(sources[1],"error"),(sources[2],"solved"),(sources[2],"solved")]
+    assert "truncated" in results[1]["error"]
+
+def test_detached_corpus_puzzle_outlives_the_corpus(tmp_path):
+    write_corpus(tmp_path/"puzzles.nkb",[(PUZZLE,None)])
+    with PuzzleCorpus(str(tmp_path/"puzzles.nkb")) as corpus:
+        puzzle = corpus[0].detached()
+    assert isinstance(puzzle,CorpusPuzzle)
+    assert puzzle.board_str_lines() == PUZZLE